@@ -1,46 +1,67 @@
 import pandas as pd
-import re
-
-def _read_csv_flexible(path):
-    df = pd.read_csv(path, dtype=str, keep_default_na=False)
-    df.columns = [c.strip().lower() for c in df.columns]
-    return df
-
-def _split_multi(val):
-    if not isinstance(val, str) or val.strip() == '':
-        return []
-    # Split on commas, semicolons, pipes, or single/double slashes
-    parts = re.split(r'[;,|/]{1,2}\s*', val.strip())
-    return [p.strip() for p in parts if p.strip()]
-
-def analyze(file_path):
-    df = _read_csv_flexible(file_path)
-    col_substrates = next((c for c in df.columns if "substrate" in c), None)
-    col_reaction = next((c for c in df.columns if "reaction" in c), None)
-    col_enzymes = next((c for c in df.columns if "enzyme" in c), None)
-    col_genes = next((c for c in df.columns if "gene" in c), None)
-
-    if not col_substrates:
-        raise ValueError("No substrates column found.")
-
-    filtered = df[df[col_substrates].str.upper().str.contains("ATP|GTP|NTP", na=False)]
-
-    records = []
-    for _, row in filtered.iterrows():
-        rxn = row.get(col_reaction, "unknown")
-        enzymes = _split_multi(row.get(col_enzymes, ""))
-        genes = _split_multi(row.get(col_genes, ""))
-        for g in genes or [""]:
-            for e in enzymes or [""]:
-                records.append(dict(reaction=rxn, enzyme=e, gene=g))
-
-    out = pd.DataFrame(records)
-    out.to_csv("reaction_gene_map_atp.tsv", sep="\t", index=False)
-    gene_counts = out[out['gene'] != ""].groupby('gene')['reaction'].nunique().reset_index()
+
+from artifacts import ArtifactWriter, write_artifact
+
+# Split on commas, semicolons, pipes, or single/double slashes
+SPLIT = r'[;,|/]{1,2}\s*'
+
+def _read_csv_flexible(path, chunksize):
+    """Stream the export in chunks, with normalised column names."""
+    for df in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunksize):
+        df.columns = [c.strip().lower() for c in df.columns]
+        yield df
+
+def _explode_multi(values, name):
+    """
+    Split every value of a column into its parts: one row per part, keyed
+    by the source row position, with a single "" for rows without parts.
+    """
+    parts = (values.str.strip().str.split(SPLIT, regex=True)
+             .explode().str.strip())
+    parts = parts[parts.notna() & (parts != "")]
+    empty = values.index.difference(parts.index)
+    parts = pd.concat([parts, pd.Series("", index=empty, dtype=object)]).sort_index(kind="stable")
+    return pd.DataFrame({"row": parts.index, name: parts.to_numpy(),
+                         name + "_pos": parts.groupby(level=0).cumcount().to_numpy()})
+
+def _expand(filtered, col_reaction, col_enzymes, col_genes):
+    """Reaction × gene × enzyme rows, in the order of the row-wise loop."""
+    filtered = filtered.reset_index(drop=True)
+    blank = pd.Series("", index=filtered.index, dtype=object)
+    reactions = filtered[col_reaction] if col_reaction else pd.Series("unknown", index=filtered.index)
+    genes = _explode_multi(filtered[col_genes] if col_genes else blank, "gene")
+    enzymes = _explode_multi(filtered[col_enzymes] if col_enzymes else blank, "enzyme")
+    pairs = genes.merge(enzymes, on="row").sort_values(["row", "gene_pos", "enzyme_pos"], kind="stable")
+    return pd.DataFrame({"reaction": reactions.to_numpy()[pairs["row"].to_numpy()],
+                         "enzyme": pairs["enzyme"].to_numpy(),
+                         "gene": pairs["gene"].to_numpy()})
+
+def analyze(file_path, chunksize=200_000):
+    n_pairs, gene_reactions = 0, []
+    writer = ArtifactWriter("reaction_gene_map_atp.tsv", ["reaction", "enzyme", "gene"])
+    for df in _read_csv_flexible(file_path, chunksize):
+        col_substrates = next((c for c in df.columns if "substrate" in c), None)
+        col_reaction = next((c for c in df.columns if "reaction" in c), None)
+        col_enzymes = next((c for c in df.columns if "enzyme" in c), None)
+        col_genes = next((c for c in df.columns if "gene" in c), None)
+
+        if not col_substrates:
+            raise ValueError("No substrates column found.")
+
+        filtered = df[df[col_substrates].str.upper().str.contains("ATP|GTP|NTP", na=False)]
+
+        out = _expand(filtered, col_reaction, col_enzymes, col_genes)
+        writer.write(out)
+        n_pairs += len(out)
+        gene_reactions.append(out.loc[out['gene'] != "", ['gene', 'reaction']].drop_duplicates())
+
+    writer.close()
+    pairs = pd.concat(gene_reactions, ignore_index=True) if gene_reactions else \
+        pd.DataFrame(columns=['gene', 'reaction'])
+    gene_counts = pairs.groupby('gene')['reaction'].nunique().reset_index()
     gene_counts.columns = ['gene', 'n_atp_consuming_reactions']
-    gene_counts.to_csv("gene_counts_atp.tsv", sep="\t", index=False)
-    print(f"Wrote {len(out)} reaction–gene pairs and {len(gene_counts)} unique genes.")
+    write_artifact(gene_counts, "gene_counts_atp.tsv", ["gene"])
+    print(f"Wrote {n_pairs} reaction–gene pairs and {len(gene_counts)} unique genes.")
 
 if __name__ == "__main__":
     analyze("ecocyc_all_reactions.csv")
-
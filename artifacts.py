@@ -0,0 +1,172 @@
+"""
+Typed, memory-mapped sidecars for the CSV/TSV intermediates.
+
+Writers still produce the text file (now through pandas' csv quoting, so
+a subsystem name with a comma stays one field). With ATP_ARTIFACTS=arrow
+and pyarrow installed they also write <stem>.arrow next to it: an uncompressed Arrow
+IPC file with typed columns, and gene / subsystem / reaction style
+columns dictionary-encoded. Readers memory-map the sidecar and read only
+the columns they ask for; string columns arrive as pandas categoricals
+built from the dictionaries (or plain strings with categorical=False).
+
+The sidecar records the size and mtime of the text file it was written
+with. If the text file has changed since (edited by hand, copied,
+regenerated without pyarrow), the sidecar is ignored and the text file is
+parsed as before. read_artifact applies read_csv's NA handling and dtype
+to the sidecar columns, so both paths return the same values. Sidecars
+are opt-in: without ATP_ARTIFACTS=arrow, or without pyarrow, only the
+text files are written and read.
+"""
+
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # optional dependency
+    pa = None
+
+ENABLED = pa is not None and os.environ.get("ATP_ARTIFACTS", "") == "arrow"
+SUFFIX = ".arrow"
+
+# Strings read_csv turns into NaN by default
+DEFAULT_NA = {"", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+              "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a",
+              "nan", "null"}
+
+
+def sidecar(path: str) -> str:
+    return os.path.splitext(path)[0] + SUFFIX
+
+
+def _sep(path: str) -> str:
+    return "\t" if path.endswith(".tsv") else ","
+
+
+def _stamp(path: str) -> bytes:
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}".encode()
+
+
+def _to_arrow(df: pd.DataFrame, dictionary) -> "pa.Table":
+    arrays = []
+    for col in df.columns:
+        if df[col].dtype == object:
+            arr = pa.array(df[col], type=pa.string())
+            arrays.append(pc.dictionary_encode(arr) if col in dictionary else arr)
+        else:
+            arrays.append(pa.array(df[col]))
+    return pa.Table.from_arrays(arrays, names=[str(c) for c in df.columns])
+
+
+class ArtifactWriter:
+    """
+    Writes a CSV/TSV in chunks (header with the first) and, when Arrow is
+    enabled, its sidecar on close. 'dictionary' names the columns to
+    dictionary-encode; per-chunk dictionaries are unified on close.
+    """
+
+    def __init__(self, path: str, dictionary=()):
+        self.path, self.dictionary = path, set(dictionary)
+        self._tables, self._header = [], True
+
+    def write(self, df: pd.DataFrame) -> None:
+        df.to_csv(self.path, sep=_sep(self.path), index=False,
+                  header=self._header, mode="w" if self._header else "a")
+        self._header = False
+        if ENABLED:
+            self._tables.append(_to_arrow(df, self.dictionary))
+
+    def close(self) -> None:
+        side = sidecar(self.path)
+        if not (ENABLED and self._tables):
+            if os.path.exists(side):
+                os.remove(side)  # would be stale
+            return
+        table = pa.concat_tables(self._tables).unify_dictionaries()
+        table = table.replace_schema_metadata({b"source": _stamp(self.path)})
+        with pa.OSFile(side, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        self._tables = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_artifact(df: pd.DataFrame, path: str, dictionary=()) -> None:
+    with ArtifactWriter(path, dictionary) as writer:
+        writer.write(df)
+
+
+def load_sidecar(path: str, columns=None, categorical: bool = True) -> Optional[pd.DataFrame]:
+    """The sidecar of 'path' as a DataFrame, or None if absent or stale."""
+    side = sidecar(path)
+    if not ENABLED or not (os.path.exists(side) and os.path.exists(path)):
+        return None
+    with pa.memory_map(side) as source:
+        reader = pa.ipc.open_file(source)
+        if (reader.schema.metadata or {}).get(b"source") != _stamp(path):
+            return None
+        table = reader.read_all()
+        if columns is not None:
+            table = table.select(list(columns))
+        if not categorical:
+            table = pa.Table.from_arrays(
+                [col.cast(col.type.value_type) if pa.types.is_dictionary(col.type) else col
+                 for col in table.columns],
+                names=table.column_names,
+            )
+        return table.to_pandas()
+
+
+def _na_strings(column: str, na_values, keep_default_na: bool) -> set:
+    if isinstance(na_values, dict):
+        na_values = na_values.get(column)
+    if na_values is None:
+        extra = set()
+    elif isinstance(na_values, str):
+        extra = {na_values}
+    else:
+        extra = {str(v) for v in na_values}
+    return (DEFAULT_NA | extra) if keep_default_na else extra
+
+
+def _as_read_csv(df: pd.DataFrame, dtype=None, na_values=None, keep_default_na: bool = True,
+                 na_filter: bool = True, **_) -> pd.DataFrame:
+    """Sidecar columns with read_csv's NA handling and dtype applied."""
+    text = (str, object, "str", "object")
+    for col in df.columns:
+        values = df[col]
+        na = _na_strings(col, na_values, keep_default_na) if na_filter else set()
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.cat.remove_categories([c for c in values.cat.categories if c in na])
+        elif values.dtype == object:
+            values = values.where(~values.isin(na))
+        to = dtype.get(col) if isinstance(dtype, dict) else dtype
+        if to in text and values.dtype != object and not isinstance(values.dtype, pd.CategoricalDtype):
+            # a missing number is an empty field in the text file
+            values = values.astype(str).where(values.notna(), np.nan if "" in na else "")
+        elif to is not None and to not in text:
+            values = values.astype(to)
+        df[col] = values
+    return df
+
+
+def read_artifact(path: str, columns=None, categorical: bool = True, **read_csv) -> pd.DataFrame:
+    """
+    Columns of an intermediate: from its sidecar when fresh (with
+    read_csv's NA strings and dtype applied), otherwise
+    pd.read_csv(path, usecols=columns, **read_csv) (separator from the
+    extension).
+    """
+    df = load_sidecar(path, columns, categorical)
+    if df is None:
+        return pd.read_csv(path, sep=_sep(path), usecols=columns, **read_csv)
+    return _as_read_csv(df, **read_csv)
@@ -0,0 +1,113 @@
+"""
+ATP-consuming genes, reactions and subsystems for a whole directory of
+genome-scale models (BiGG JSON or SBML), one model per worker process.
+
+Each model is indexed in one pass (model_index) and its reactions are
+labelled by nucleotide_classes. A reaction is kept when it meets
+classify_atp_genes.py's rule (atp_c and adp_c both present, column
+atp_adp) or when it can consume ATP by sign and bounds (atp_label
+"consumer" or "reversible"). Genes are every gene ID in the reaction's
+rule, so models of other organisms (iLG240, ...) work as well as E. coli
+ones; reactions without genes are kept with gene "".
+
+    python batch_atp_genes.py models/ --out atp_genes_by_model.csv
+"""
+
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from model_index import ModelIndex
+from nucleotide_classes import classify_reactions
+
+MODEL_SUFFIXES = (".json", ".xml", ".sbml", ".xml.gz")
+COLUMNS = ["model_id", "model_file", "gene", "gene_name", "reaction", "subsystem",
+           "atp_label", "atp_adp"]
+
+
+def model_files(directory: str) -> list:
+    return sorted(p for p in glob.glob(os.path.join(directory, "*"))
+                  if p.endswith(MODEL_SUFFIXES))
+
+
+def extract(path: str) -> pd.DataFrame:
+    """
+    One row per (ATP reaction, gene) of the model in 'path'; its
+    (model_id, model_file) is in df.attrs["model"], also when no
+    reaction qualifies.
+    """
+    index = ModelIndex.from_file(path, gene_pattern=None)
+    labels = classify_reactions(index)["ATP"]
+    atp_adp = set(index.atp_reactions())
+    keep = [r for r in index.metabolites
+            if r in atp_adp or labels[r] in ("consumer", "reversible")]
+
+    rows = []
+    for rxn_id in keep:
+        genes = list(dict.fromkeys(index.genes[rxn_id])) or [""]
+        for g in genes:
+            rows.append((index.id, os.path.basename(path), g, index.gene_name.get(g, ""),
+                         rxn_id, index.subsystem[rxn_id], labels[rxn_id], rxn_id in atp_adp))
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    df.attrs["model"] = (index.id, os.path.basename(path))
+    return df
+
+
+def summarize(table: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per model: ATP reactions, genes and subsystems under each criterion.
+    Every model in table.attrs["models"] (set by batch_extract) gets a
+    row, with zeros when it has no ATP reactions.
+    """
+    keys = ["model_id", "model_file"]
+    genes = table["gene"] != ""
+    consumer = table["atp_label"].isin(["consumer", "reversible"])
+    by_model = table.groupby(keys)
+    df = pd.DataFrame({
+        "atp_reactions": by_model["reaction"].nunique(),
+        "atp_adp_reactions": table[table["atp_adp"]].groupby(keys)["reaction"].nunique(),
+        "consumer_reactions": table[consumer].groupby(keys)["reaction"].nunique(),
+        "atp_genes": table[genes].groupby(keys)["gene"].nunique(),
+        "subsystems": by_model["subsystem"].nunique(),
+    })
+    models = table.attrs.get("models")
+    if models is not None:
+        df = df.reindex(pd.MultiIndex.from_tuples(models, names=keys))
+    return df.fillna(0).astype(int).reset_index()
+
+
+def batch_extract(paths, processes: int = None) -> pd.DataFrame:
+    """
+    Combined table for all models, keyed by model_id (then file). The
+    (model_id, model_file) of every model, in the same order, is kept in
+    table.attrs["models"].
+    """
+    paths = list(paths)
+    if processes == 1 or len(paths) <= 1:
+        tables = list(map(extract, paths))
+    else:
+        with ProcessPoolExecutor(max_workers=min(processes or os.cpu_count() or 1, len(paths))) as pool:
+            tables = list(pool.map(extract, paths))
+    table = pd.concat(tables + [pd.DataFrame(columns=COLUMNS)], ignore_index=True)
+    table["atp_adp"] = table["atp_adp"].astype(bool)
+    table = table.sort_values(["model_id", "model_file"], kind="stable", ignore_index=True)
+    table.attrs["models"] = sorted(t.attrs["model"] for t in tables)
+    return table
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="ATP genes for every model in a directory")
+    parser.add_argument("directory", nargs="?", default=".")
+    parser.add_argument("--out", default="atp_genes_by_model.csv")
+    parser.add_argument("--processes", type=int)
+    args = parser.parse_args()
+
+    paths = model_files(args.directory)
+    table = batch_extract(paths, args.processes)
+    table.to_csv(args.out, index=False)
+    print(summarize(table).to_string(index=False))
+    print(f"✅ Saved {len(table)} rows from {len(paths)} models to {args.out}")
@@ -1,127 +1,82 @@
-import json
-import re
-from collections import defaultdict
+import pandas as pd
 
-# Load the model file
-with open("iML1515.json", "r") as f:
-    M = json.load(f)
+from artifacts import write_artifact
+from model_index import ModelIndex
+from nucleotide_classes import classify_reactions
 
-print("Model loaded:", M.get("id", "unknown"))
-print("Number of reactions:", len(M.get("reactions", [])))
-print("Number of genes:", len(M.get("genes", [])))
+# Load and index the model file (one pass over the reactions)
+index = ModelIndex.from_json("iML1515.json")
+
+print("Model loaded:", index.id)
+print("Number of reactions:", index.n_reactions)
+print("Number of genes:", index.n_genes)
 
 # Peek at a few reactions that involve ATP-like metabolites
 print("\nChecking reactions that mention 'atp'...")
 count = 0
-for rxn in M["reactions"]:
-    if any("atp" in m.lower() for m in rxn["metabolites"].keys()):
-        print(rxn["id"], list(rxn["metabolites"].keys()))
+for rxn_id, stoich in index.metabolites.items():
+    if any("atp" in m.lower() for m in stoich.keys()):
+        print(rxn_id, list(stoich.keys()))
         count += 1
         if count >= 5:
             break
-# Identify reactions that consume ATP
-rxn_to_atp = {}
-rxn_genes = {}
-for rxn in M["reactions"]:
-    stoich = rxn.get("metabolites", {})
-    consumes_atp = False
-    if "atp_c" in stoich and "adp_c" in stoich:
-        consumes_atp = True
-
-    rxn_to_atp[rxn["id"]] = consumes_atp
-
-    # Extract gene IDs from gene_reaction_rule
-    gene_rule = rxn.get("gene_reaction_rule", "")
-    genes = re.findall(r"b\d{4}", gene_rule)
-    rxn_genes[rxn["id"]] = genes
-
-# Count how many genes touch at least one ATP-consuming reaction
-gene_atp = defaultdict(int)
-for rxn_id, genes in rxn_genes.items():
-    if rxn_to_atp[rxn_id]:
-        for g in genes:
-            gene_atp[g] += 1
-
-print("\nGenes with ≥1 ATP-consuming reaction:",
-      sum(1 for g in gene_atp if gene_atp[g] > 0))
+
+# Reactions that consume ATP, and the genes that touch at least one
+atp_reactions = index.atp_reactions()
+gene_to_rxns = index.genes_of(atp_reactions)
+atp_genes = sorted(gene_to_rxns)
+gene_to_name = index.gene_name
+
+print("\nGenes with ≥1 ATP-consuming reaction:", len(atp_genes))
 
 # Save list of ATP-consuming genes to a text file
 with open("atp_genes.txt", "w") as f:
-    for g in sorted(gene_atp.keys()):
-        if gene_atp[g] > 0:
-            f.write(g + "\n")
+    for g in atp_genes:
+        f.write(g + "\n")
 print("Saved ATP-consuming gene list to atp_genes.txt")
 
-# --- Map b-numbers to gene names using the model data ---
-gene_id_to_name = {}
-for g in M["genes"]:
-    gene_id_to_name[g["id"]] = g.get("name", "")
-
 # Create a CSV with both ID and gene name
-with open("atp_genes_with_names.csv", "w") as f:
-    f.write("b_number,gene_name\n")
-    for g in sorted(gene_atp.keys()):
-        if gene_atp[g] > 0:
-            name = gene_id_to_name.get(g, "")
-            f.write(f"{g},{name}\n")
+names = [gene_to_name.get(g, "") for g in atp_genes]
+write_artifact(pd.DataFrame({"b_number": atp_genes, "gene_name": names}),
+               "atp_genes_with_names.csv", ["gene_name"])
 
 print("✅ Saved ATP gene names to atp_genes_with_names.csv")
 
-# --- Add reaction IDs for each gene ---
-gene_to_rxns = defaultdict(list)
-for rxn_id, genes in rxn_genes.items():
-    if rxn_to_atp[rxn_id]:
-        for g in genes:
-            if gene_atp[g] > 0:
-                gene_to_rxns[g].append(rxn_id)
-
 # Save extended table with gene, name, and reactions
-with open("atp_genes_with_reactions.csv", "w") as f:
-    f.write("b_number,gene_name,reactions\n")
-    for g in sorted(gene_atp.keys()):
-        if gene_atp[g] > 0:
-            name = gene_id_to_name.get(g, "")
-            rxns = "|".join(sorted(set(gene_to_rxns[g])))
-            f.write(f"{g},{name},{rxns}\n")
+write_artifact(pd.DataFrame({
+    "b_number": atp_genes,
+    "gene_name": names,
+    "reactions": ["|".join(sorted(gene_to_rxns[g])) for g in atp_genes],
+}), "atp_genes_with_reactions.csv", ["gene_name"])
 
 print("✅ Saved ATP gene → reaction mapping to atp_genes_with_reactions.csv")
 
 # --- Add pathway (subsystem) info and save CSV ---
-
-# Make a dictionary: reaction ID → subsystem name
-rxn_to_pathway = {r["id"]: r.get("subsystem", "Unknown") for r in M["reactions"]}
-
-# Make a dictionary: b-number → gene name
-gene_to_name = {g["id"]: g.get("name", "") for g in M["genes"]}
-
-# Write the output file
-with open("atp_genes_with_pathways.csv", "w") as f:
-    f.write("b_number,gene_name,reaction,subsystem\n")
-    for rxn_id, genes in rxn_genes.items():
-        if rxn_to_atp[rxn_id]:
-            subsystem = rxn_to_pathway.get(rxn_id, "Unknown")
-            for g in genes:
-                f.write(f"{g},{gene_to_name.get(g, '')},{rxn_id},{subsystem}\n")
+pathway_rows = [
+    (g, gene_to_name.get(g, ""), rxn_id, index.subsystem[rxn_id])
+    for rxn_id in atp_reactions
+    for g in index.genes[rxn_id]
+]
+write_artifact(pd.DataFrame(pathway_rows, columns=["b_number", "gene_name", "reaction", "subsystem"]),
+               "atp_genes_with_pathways.csv", ["b_number", "gene_name", "reaction", "subsystem"])
 
 print("✅ Saved ATP gene–reaction–pathway list to atp_genes_with_pathways.csv")
 
-# --- Condensed version: one line per gene ---
-from collections import defaultdict
-
-gene_summary = defaultdict(lambda: {"name": "", "reactions": set(), "subsystems": set()})
-
-for rxn_id, genes in rxn_genes.items():
-    if rxn_to_atp[rxn_id]:
-        subsystem = rxn_to_pathway.get(rxn_id, "Unknown")
-        for g in genes:
-            gene_summary[g]["name"] = gene_to_name.get(g, "")
-            gene_summary[g]["reactions"].add(rxn_id)
-            gene_summary[g]["subsystems"].add(subsystem)
-
-with open("atp_genes_condensed.csv", "w") as f:
-    f.write("b_number,gene_name,reactions,subsystems\n")
-    for g, d in gene_summary.items():
-        f.write(f"{g},{d['name']},{'|'.join(sorted(d['reactions']))},{'|'.join(sorted(d['subsystems']))}\n")
+# --- Condensed version: one line per gene (in order of first appearance) ---
+condensed_rows = [
+    (g, gene_to_name.get(g, ""), "|".join(sorted(rxns)),
+     "|".join(sorted({index.subsystem[r] for r in rxns})))
+    for g, rxns in gene_to_rxns.items()
+]
+write_artifact(pd.DataFrame(condensed_rows, columns=["b_number", "gene_name", "reactions", "subsystems"]),
+               "atp_genes_condensed.csv", ["gene_name", "subsystems"])
 
 print("✅ Saved condensed gene summary to atp_genes_condensed.csv")
 
+# --- Sign- and bound-aware labels for every nucleotide pool ---
+labels = classify_reactions(index)
+involved = labels[(labels != "").any(axis=1)]
+involved.to_csv("reaction_nucleotide_classes.csv")
+print(f"\nNucleotide-pool reactions: {len(involved)} "
+      f"({(labels['ATP'] == 'consumer').sum()} ATP consumers by sign and bounds)")
+print("✅ Saved per-pool reaction labels to reaction_nucleotide_classes.csv")
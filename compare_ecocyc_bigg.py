@@ -1,21 +1,31 @@
+import os
+import sys
+
 import pandas as pd
 
-# Load both files
-ecocyc = pd.read_csv("gene_counts_atp.tsv", sep="\t")
-bigg = pd.read_csv("atp_genes_with_pathways.csv", on_bad_lines="skip")
+from cross_reference import CrossReference, read_source
+from gene_index import build_index
+
+ECOCYC_GENES = "ecocyc_genes.tsv"   # optional EcoCyc gene table (names, synonyms, b-numbers)
 
-# Normalize gene names
-ecocyc["gene"] = ecocyc["gene"].str.lower().str.strip()
-bigg["gene_name"] = bigg["gene_name"].str.lower().str.strip()
+# Load both sources onto canonical b-numbers (no rows dropped)
+index = build_index("iML1515.json", [ECOCYC_GENES] if os.path.exists(ECOCYC_GENES) else [])
+xref = CrossReference(index)
+xref.add("ecocyc", read_source("gene_counts_atp.tsv", "gene"))
+xref.add("bigg", read_source("atp_genes_with_pathways.csv", "b_number"))
 
-# Unique sets
-ecocyc_genes = set(ecocyc["gene"].dropna())
-bigg_genes = set(bigg["gene_name"].dropna())
+# Further sources for the provenance table: name=path[:column]
+for arg in sys.argv[1:]:
+    name, spec = arg.split("=", 1)
+    path, _, column = spec.partition(":")
+    xref.add(name, read_source(path, column or None))
 
 # Compare
-shared = ecocyc_genes & bigg_genes
-only_ecocyc = ecocyc_genes - bigg_genes
-only_bigg = bigg_genes - ecocyc_genes
+ecocyc_genes = xref.select(["ecocyc"])
+bigg_genes = xref.select(["bigg"])
+shared = xref.select(["ecocyc", "bigg"])
+only_ecocyc = xref.select(["ecocyc"], ["bigg"])
+only_bigg = xref.select(["bigg"], ["ecocyc"])
 
 # Summary
 print("EcoCyc total genes:", len(ecocyc_genes))
@@ -24,8 +34,9 @@ print("Shared genes:", len(shared))
 print("Unique to EcoCyc:", len(only_ecocyc))
 print("Unique to BiGG:", len(only_bigg))
 
-# Save lists
-pd.Series(sorted(only_ecocyc)).to_csv("unique_to_ecocyc.csv", index=False)
-pd.Series(sorted(only_bigg)).to_csv("unique_to_bigg.csv", index=False)
-pd.Series(sorted(shared)).to_csv("shared_genes.csv", index=False)
-
+# Save lists (gene names, lower case; b-number / raw name where unnamed)
+pd.Series(sorted(xref.label(only_ecocyc))).to_csv("unique_to_ecocyc.csv", index=False)
+pd.Series(sorted(xref.label(only_bigg))).to_csv("unique_to_bigg.csv", index=False)
+pd.Series(sorted(xref.label(shared))).to_csv("shared_genes.csv", index=False)
+xref.provenance().to_csv("gene_provenance.csv", index=False)
+print("Per-gene sources written to gene_provenance.csv")
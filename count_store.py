@@ -0,0 +1,256 @@
+"""
+Persistent per-line contingency counts and enrichment results (sqlite3).
+
+A dataset is keyed by the ingest preset (name and read options) and a
+hash of the ATP gene set (the gene list when given, otherwise the
+is_ATP_gene column) together with the ATP and genome totals of the
+Fisher tables. With a gene list the ATP total defaults to its size. Within a dataset the store keeps,
+per line, the event and gene counts and the unique mutated genes (with
+their ATP flag), and the gene- and event-level Fisher results.
+
+Ingesting a file records its content hash, so re-ingesting the file
+last ingested is skipped outright. Otherwise the file is streamed (mutation_ingest) and
+only lines whose counts or gene sets changed are rewritten and retested;
+the pooled "__all__" row is then rebuilt from the stored gene sets
+without touching the raw data. (A gene counts as ATP in the pooled row
+if it was flagged ATP in any line.)
+
+    python count_store.py ingest fixed_SNP_bylines_with_ATPnew.csv --preset fixed
+    python count_store.py results --format json
+"""
+
+import hashlib
+import json
+import sqlite3
+import sys
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from enrichment_engine import event_level_test, gene_level_test
+from mutation_ingest import PRESETS, ingest
+
+DEFAULT_DB = "enrichment_counts.sqlite"
+TOTAL_GENES = 4448
+ATP_TOTAL = 225
+POOLED = "__all__"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    dataset TEXT PRIMARY KEY, preset TEXT, atp_hash TEXT,
+    atp_total INTEGER, total_genes INTEGER
+);
+CREATE TABLE IF NOT EXISTS sources (
+    dataset TEXT, file_hash TEXT, path TEXT,
+    PRIMARY KEY (dataset, file_hash)
+);
+CREATE TABLE IF NOT EXISTS lines (
+    dataset TEXT, line TEXT, events INTEGER, atp_events INTEGER,
+    genes INTEGER, atp_genes INTEGER, digest TEXT, file_hash TEXT,
+    PRIMARY KEY (dataset, line)
+);
+CREATE TABLE IF NOT EXISTS line_genes (
+    dataset TEXT, line TEXT, gene TEXT, is_atp INTEGER,
+    PRIMARY KEY (dataset, line, gene)
+);
+CREATE TABLE IF NOT EXISTS results (
+    dataset TEXT, line TEXT, level TEXT, events INTEGER, atp_events INTEGER,
+    genes INTEGER, atp_genes INTEGER, odds_ratio REAL, p_value REAL,
+    ci_low REAL, ci_high REAL,
+    PRIMARY KEY (dataset, line, level)
+);
+"""
+
+
+def file_hash(path: str, block: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(block), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def atp_set_hash(atp_genes: Optional[Iterable[str]], atp_total: int, total_genes: int) -> str:
+    if atp_genes is None:
+        text = "is_ATP_gene column"
+    else:
+        text = "\n".join(sorted(set(atp_genes)))
+    text += f";{atp_total};{total_genes}"
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _atp_total(atp_genes, atp_total: Optional[int]) -> int:
+    if atp_total is not None:
+        return atp_total
+    return ATP_TOTAL if atp_genes is None else len(set(atp_genes))
+
+
+def _line_digest(counts: tuple, genes: dict) -> str:
+    text = repr(counts) + "\n" + "\n".join(f"{g}\t{int(a)}" for g, a in sorted(genes.items()))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class CountStore:
+    """Per-line counts and results for any number of datasets."""
+
+    def __init__(self, path: str = DEFAULT_DB):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def dataset(self, preset: str = "fixed", atp_genes=None,
+                atp_total: Optional[int] = None, total_genes: int = TOTAL_GENES) -> str:
+        """
+        Key of the dataset for this preset, ATP set and totals (created if
+        new). atp_total defaults to ATP_TOTAL, or to the size of
+        'atp_genes' when given.
+        """
+        atp_total = _atp_total(atp_genes, atp_total)
+        atp_hash = atp_set_hash(atp_genes, atp_total, total_genes)
+        read = json.dumps(PRESETS[preset]["read"], sort_keys=True)
+        key = hashlib.sha256(f"{preset};{read};{atp_hash}".encode()).hexdigest()[:16]
+        self.db.execute(
+            "INSERT OR IGNORE INTO datasets VALUES (?, ?, ?, ?, ?)",
+            (key, preset, atp_hash, atp_total, total_genes),
+        )
+        return key
+
+    def ingest(self, path: str, preset: str = "fixed", atp_genes=None,
+               atp_total: Optional[int] = None, total_genes: int = TOTAL_GENES,
+               replace: bool = True) -> dict:
+        """
+        Bring the store up to date with 'path'. With replace=True the file
+        is the complete table and lines missing from it are dropped; with
+        replace=False its lines are added to (or replace) the stored ones.
+        atp_total defaults as in dataset().
+        Returns {"dataset", "skipped", "updated": [...], "removed": [...]}.
+        """
+        if atp_genes is not None:
+            atp_genes = set(atp_genes)
+        atp_total = _atp_total(atp_genes, atp_total)
+        key = self.dataset(preset, atp_genes, atp_total, total_genes)
+        digest = file_hash(path)
+        report = {"dataset": key, "skipped": False, "updated": [], "removed": []}
+        last = self.db.execute(
+            "SELECT file_hash FROM sources WHERE dataset = ? ORDER BY rowid DESC LIMIT 1",
+            (key,)).fetchone()
+        if last == (digest,):
+            report["skipped"] = True
+            return report
+
+        acc = ingest(path, preset, atp_genes=atp_genes)
+        counts = acc.counts()
+        stored = dict(self.db.execute(
+            "SELECT line, digest FROM lines WHERE dataset = ?", (key,)))
+
+        with self.db:
+            for line, row in counts.iterrows():
+                genes = acc.line_genes(line)
+                values = tuple(int(v) for v in row)
+                line_digest = _line_digest(values, genes)
+                if stored.get(line) == line_digest:
+                    continue
+                self.db.execute("DELETE FROM line_genes WHERE dataset = ? AND line = ?", (key, line))
+                self.db.execute(
+                    "INSERT OR REPLACE INTO lines VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, line, *values, line_digest, digest),
+                )
+                self.db.executemany(
+                    "INSERT INTO line_genes VALUES (?, ?, ?, ?)",
+                    [(key, line, g, int(a)) for g, a in genes.items()],
+                )
+                report["updated"].append(line)
+            if replace:
+                for line in sorted(set(stored) - set(counts.index)):
+                    for table in ("lines", "line_genes", "results"):
+                        self.db.execute(f"DELETE FROM {table} WHERE dataset = ? AND line = ?",
+                                        (key, line))
+                    report["removed"].append(line)
+            self.db.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?)", (key, digest, path))
+            if report["updated"] or report["removed"]:
+                self._test(key, report["updated"] + [POOLED], atp_total, total_genes)
+        return report
+
+    def _pooled_counts(self, key: str) -> tuple:
+        events, atp_events = self.db.execute(
+            "SELECT COALESCE(SUM(events), 0), COALESCE(SUM(atp_events), 0) "
+            "FROM lines WHERE dataset = ?", (key,)).fetchone()
+        genes, atp_genes = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(a), 0) FROM "
+            "(SELECT MAX(is_atp) AS a FROM line_genes WHERE dataset = ? GROUP BY gene)",
+            (key,)).fetchone()
+        return events, atp_events, genes, atp_genes
+
+    def _test(self, key: str, lines: list, atp_total: int, total_genes: int) -> None:
+        """Recompute the Fisher results for 'lines' (POOLED = all lines)."""
+        rows = []
+        for line in lines:
+            if line == POOLED:
+                rows.append((line, *self._pooled_counts(key)))
+            else:
+                rows.append((line, *self.db.execute(
+                    "SELECT events, atp_events, genes, atp_genes FROM lines "
+                    "WHERE dataset = ? AND line = ?", (key, line)).fetchone()))
+        counts = pd.DataFrame(rows, columns=["line", "events", "atp_events", "genes", "atp_genes"])
+        for level, stats in (
+            ("gene", gene_level_test(counts["atp_genes"], counts["genes"], atp_total, total_genes)),
+            ("event", event_level_test(counts["atp_events"], counts["events"], atp_total, total_genes)),
+        ):
+            self.db.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(key, line, level, *map(int, n), *map(float, r))
+                 for line, n, r in zip(counts["line"], counts.iloc[:, 1:].itertuples(index=False),
+                                       stats.itertuples(index=False))],
+            )
+
+    def counts(self, key: str) -> pd.DataFrame:
+        return pd.read_sql_query(
+            "SELECT line, events, atp_events, genes, atp_genes FROM lines "
+            "WHERE dataset = ? ORDER BY line", self.db, params=(key,), index_col="line")
+
+    def results(self, key: Optional[str] = None) -> pd.DataFrame:
+        """Counts and Fisher results, one row per (dataset, line, level)."""
+        query, params = "SELECT * FROM results", ()
+        if key is not None:
+            query, params = query + " WHERE dataset = ?", (key,)
+        return pd.read_sql_query(query + " ORDER BY dataset, line, level",
+                                 self.db, params=params)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Persistent per-line enrichment counts")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_in = sub.add_parser("ingest", help="add or update a per-line mutation table")
+    p_in.add_argument("path")
+    p_in.add_argument("--preset", default="fixed", choices=["summary", "fixed", "flag"])
+    p_in.add_argument("--atp-genes", help="atp_genes_with_names.csv to flag ATP genes by name")
+    p_in.add_argument("--merge", action="store_true",
+                      help="keep stored lines that are missing from this file")
+    p_out = sub.add_parser("results", help="print stored results")
+    p_out.add_argument("--dataset")
+    p_out.add_argument("--format", default="csv", choices=["csv", "json"])
+    args = parser.parse_args(argv)
+
+    store = CountStore(args.db)
+    if args.command == "ingest":
+        atp_genes = None
+        if args.atp_genes:
+            atp_genes = pd.read_csv(args.atp_genes)["gene_name"].dropna().str.lower().str.strip()
+        report = store.ingest(args.path, args.preset, atp_genes, replace=not args.merge)
+        print(json.dumps(report))
+    else:
+        df = store.results(args.dataset)
+        if args.format == "json":
+            print(df.to_json(orient="records"))
+        else:
+            df.to_csv(sys.stdout, index=False)
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Cross-reference of ATP-gene annotations from any number of sources.
+
+Every source (EcoCyc gene counts, BiGG models, curated lists) is resolved
+to canonical b-numbers through gene_index, so EcoCyc names, BiGG names
+and b-numbers join; names that do not resolve stay as their normalized
+name. Membership is one bit per source, packed per gene, so any
+intersection / difference query is a single masked comparison over all
+genes, and the Venn regions are the distinct bit rows.
+
+    python cross_reference.py ecocyc=gene_counts_atp.tsv:gene \\
+        iML1515=atp_genes_with_pathways.csv:b_number curated=my_list.txt
+"""
+
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+
+from artifacts import load_sidecar
+from gene_index import GeneIndex, normalize
+from model_index import ModelIndex
+
+
+def _fit_fields(fields: list, n_columns: int, sep: str) -> list:
+    """Fold surplus fields (unquoted separators in the last column) back into it."""
+    if len(fields) < n_columns:
+        return fields + [""] * (n_columns - len(fields))
+    return fields[:n_columns - 1] + [sep.join(fields[n_columns - 1:])]
+
+
+def read_table(path: str) -> pd.DataFrame:
+    """
+    Read a CSV/TSV annotation table without dropping rows: when a row has
+    more fields than the header (e.g. a subsystem name with a comma in
+    atp_genes_with_pathways.csv), the surplus is kept in the last column.
+    """
+    sep = "\t" if path.endswith((".tsv", ".txt")) else ","
+    with open(path, newline="") as f:
+        reader = csv.reader(f, delimiter=sep)
+        header = next(reader)
+        rows = [_fit_fields(r, len(header), sep) for r in reader if r]
+    return pd.DataFrame(rows, columns=header, dtype=str)
+
+
+def read_source(path: str, column: str = None) -> pd.Series:
+    """
+    Gene identifiers of one source: a column of a CSV/TSV table, the
+    lines of a plain gene list, or the ATP-consuming genes (atp_c and
+    adp_c, as classify_atp_genes.py) of a BiGG JSON model. Table columns
+    come from the typed sidecar when one is fresh (see artifacts).
+    """
+    if path.endswith(".json"):
+        index = ModelIndex.from_json(path)
+        return pd.Series(list(index.genes_of(index.atp_reactions())), dtype=object)
+    if column is None:
+        with open(path) as f:
+            return pd.Series([ln.strip() for ln in f if ln.strip()], dtype=object)
+    df = load_sidecar(path, [column], categorical=False)
+    return (df if df is not None else read_table(path))[column]
+
+
+class CrossReference:
+    """Canonical genes x sources membership, packed as bits."""
+
+    def __init__(self, index: GeneIndex = None):
+        self.index = index
+        self.sources = []          # bit order
+        self._ids, self._raw = [], []
+        self._genes = self._bits = None
+
+    def add(self, name: str, genes) -> None:
+        genes = pd.Series(genes, dtype=object).dropna().astype(str)
+        genes = genes[genes.str.strip() != ""]
+        if self.index is not None:
+            ids = self.index.resolve(genes, keep_unresolved=True)
+        else:
+            ids = normalize(genes)
+        self.sources.append(name)
+        self._ids.append(ids.to_numpy(dtype=object))
+        self._raw.append(genes.to_numpy(dtype=object))
+        self._genes = self._bits = None
+
+    def _build(self) -> None:
+        if self._bits is not None:
+            return
+        codes, self._genes = pd.factorize(np.concatenate(self._ids + [np.array([], dtype=object)]))
+        source = np.repeat(np.arange(len(self.sources)), [len(ids) for ids in self._ids])
+        member = np.zeros((len(self._genes), len(self.sources)), dtype=bool)
+        member[codes, source] = True
+        self._bits = np.packbits(member, axis=1, bitorder="little")
+
+    @property
+    def genes(self) -> pd.Index:
+        self._build()
+        return pd.Index(self._genes, name="gene")
+
+    def membership(self) -> pd.DataFrame:
+        """Boolean genes x sources table."""
+        self._build()
+        member = np.unpackbits(self._bits, axis=1, count=len(self.sources), bitorder="little")
+        return pd.DataFrame(member.astype(bool), index=self.genes, columns=self.sources)
+
+    def _mask(self, names) -> np.ndarray:
+        member = np.isin(self.sources, list(names))
+        unknown = set(names) - set(self.sources)
+        if unknown:
+            raise KeyError(f"Unknown sources: {sorted(unknown)}")
+        return np.packbits(member, bitorder="little")
+
+    def select(self, include=(), exclude=(), any_of=()) -> pd.Index:
+        """
+        Genes in every source of 'include', in none of 'exclude' and (if
+        given) in at least one of 'any_of'. select(["a"], ["b"]) is a - b;
+        select(["a", "b"]) is a & b; a Venn region lists every source.
+        """
+        self._build()
+        inc, exc = self._mask(include), self._mask(exclude)
+        keep = ((self._bits & inc) == inc).all(axis=1) & ((self._bits & exc) == 0).all(axis=1)
+        if any_of:
+            keep &= (self._bits & self._mask(any_of)).any(axis=1)
+        return self.genes[keep]
+
+    def _region_labels(self) -> tuple:
+        rows, inverse, counts = np.unique(self._bits, axis=0, return_inverse=True,
+                                          return_counts=True)
+        member = np.unpackbits(rows, axis=1, count=len(self.sources), bitorder="little")
+        labels = np.array(["|".join(np.array(self.sources)[m.astype(bool)]) for m in member],
+                          dtype=object)
+        return labels, np.ravel(inverse), counts, member.sum(axis=1)
+
+    def venn(self) -> pd.DataFrame:
+        """Gene count of every non-empty Venn region (sources joined by '|')."""
+        self._build()
+        labels, _, counts, n = self._region_labels()
+        df = pd.DataFrame({"sources": labels, "n_sources": n, "n_genes": counts})
+        return df.sort_values(["n_sources", "sources"], ascending=[False, True], ignore_index=True)
+
+    def provenance(self) -> pd.DataFrame:
+        """Per gene: name, sources containing it and the identifiers each used."""
+        self._build()
+        labels, inverse, _, n = self._region_labels()
+        raw = pd.DataFrame({
+            "gene": np.concatenate(self._ids + [np.array([], dtype=object)]),
+            "identifier": [f"{s}:{g}" for s, raw in zip(self.sources, self._raw) for g in raw],
+        }).drop_duplicates()
+        identifiers = raw.groupby("gene", sort=False)["identifier"].agg("|".join)
+        names = (self.index.name(self._genes).to_numpy() if self.index is not None
+                 else np.full(len(self._genes), "", dtype=object))
+        return pd.DataFrame({
+            "gene": self._genes,
+            "name": names,
+            "n_sources": n[inverse],
+            "sources": labels[inverse],
+            "identifiers": identifiers.reindex(self._genes).to_numpy(),
+        }).sort_values("gene", ignore_index=True)
+
+    def label(self, genes) -> pd.Series:
+        """Lower-case gene name for display (the identifier when unnamed)."""
+        genes = pd.Series(genes, dtype=object)
+        if self.index is None:
+            return genes
+        names = self.index.name(genes).str.lower()
+        return names.where(names != "", genes)
+
+
+if __name__ == "__main__":
+    import sys
+
+    from gene_index import build_index
+
+    index = build_index("iML1515.json", [p for p in ["ecocyc_genes.tsv"] if os.path.exists(p)])
+    xref = CrossReference(index)
+    for arg in sys.argv[1:]:  # name=path[:column]
+        name, spec = arg.split("=", 1)
+        path, _, column = spec.partition(":")
+        xref.add(name, read_source(path, column or None))
+
+    xref.provenance().to_csv("gene_provenance.csv", index=False)
+    venn = xref.venn()
+    venn.to_csv("source_venn_regions.csv", index=False)
+    print(venn.to_string(index=False))
+    print("✅ Saved: gene_provenance.csv, source_venn_regions.csv")
@@ -1,20 +1,22 @@
+import os
+
 import pandas as pd
 from scipy.stats import fisher_exact
 
+from artifacts import read_artifact
+from gene_index import build_index
+
+ECOCYC_GENES = "ecocyc_genes.tsv"   # optional EcoCyc gene table (names, synonyms, b-numbers)
+
 # --- Load datasets ---
 mutations = pd.read_csv("mutated_CDS_fixed.csv")        # has 'CDS'
-atp = pd.read_csv("atp_genes_with_names.csv")           # has 'gene_name'
+atp = read_artifact("atp_genes_with_names.csv", ["b_number"])
 
-# --- Clean and normalise names ---
-def clean_name(x):
-    if isinstance(x, str):
-        x = x.lower().strip()
-        x = x.replace(" cds", "")           # remove trailing CDS
-        x = x.replace(" protein", "")       # remove generic labels
-    return x
-
-mutations["CDS"] = mutations["CDS"].apply(clean_name)
-atp["gene_name"] = atp["gene_name"].apply(clean_name)
+# --- Resolve names, synonyms and b-numbers to canonical b-numbers ---
+index = build_index("iML1515.json", [ECOCYC_GENES] if os.path.exists(ECOCYC_GENES) else [])
+unresolved = index.unresolved(mutations["CDS"])
+mutations["CDS"] = index.resolve(mutations["CDS"], keep_unresolved=True)
+atp["gene_name"] = index.resolve(atp["b_number"], keep_unresolved=True)
 
 # --- Identify overlaps ---
 mutated_genes = set(mutations["CDS"])
@@ -65,6 +67,12 @@ print(f"  Gene-level enrichment:  odds ratio = {odds_gene:.2f},  p = {p_gene:.3e
 print(f"  Event-level enrichment: odds ratio = {odds_event:.2f}, p = {p_event:.3e}")
 
 # --- Save overlap list ---
-pd.DataFrame(sorted(overlap), columns=["gene_name"]).to_csv("mutated_ATP_fixed_overlap.csv", index=False)
+overlap_df = pd.DataFrame({"b_number": sorted(overlap)})
+overlap_df.insert(0, "gene_name", index.name(overlap_df["b_number"]))
+overlap_df.sort_values("gene_name").to_csv("mutated_ATP_fixed_overlap.csv", index=False)
 print("\n✅ Saved overlapping ATP gene list to 'mutated_ATP_fixed_overlap.csv'")
 
+unresolved.to_csv("unresolved_mutated_genes.csv", index=False)
+print(f"⚠️  {len(unresolved)} mutated gene names did not resolve to a b-number "
+      "(counted by name); see 'unresolved_mutated_genes.csv'")
+
@@ -1,20 +1,19 @@
-import pandas as pd, re
+import pandas as pd
+
+from artifacts import read_artifact
+from reaction_equations import consumed_nucleotides
 
 # Input files
 MAP = "reaction_gene_map_atp.tsv"
 GENES = "genes_to_lookup.txt"
 
-# Load the reaction map
-df = pd.read_csv(MAP, sep="\t", dtype=str).fillna("")
+# Load the reaction map (typed sidecar when present)
+df = read_artifact(MAP, categorical=False, dtype=str).fillna("")
 df.columns = [c.strip().lower() for c in df.columns]
 
-# Keep reactions where ATP is on the left (ATP consumed)
-def left_has_atp(s: str) -> bool:
-    parts = re.split(r'\s*(?:<[-−]*>|[-−]*>|→|⇌|<->|->)\s*', str(s), maxsplit=1)
-    left = parts[0].upper() if parts else ""
-    return bool(re.search(r'\bATP\b', left))
-
-df = df[df["reaction"].apply(left_has_atp)].copy()
+# Keep reactions where ATP is on the left (ATP consumed); each distinct
+# equation is parsed once
+df = df[consumed_nucleotides(df["reaction"], ["ATP"])["ATP"]].copy()
 
 # Load gene list
 with open(GENES) as f:
@@ -23,26 +22,25 @@ with open(GENES) as f:
 df["gene"] = df["gene"].astype(str).str.strip()
 df = df[df["gene"].str.lower().isin(targets)].copy()
 
-# Helper functions
-def uniq(vals): 
-    return sorted(v for v in set(vals) if v)
+# Aggregate reactions per gene: distinct non-empty values, sorted and joined
+def joined_unique(col, sep):
+    vals = df.loc[df[col] != "", ["gene", col]].drop_duplicates().sort_values(["gene", col])
+    return vals.groupby("gene")[col].agg(sep.join)
 
-# Aggregate reactions per gene
-out = (df.groupby("gene", as_index=False)
-          .agg(
-              n_reactions=("reaction", lambda s: len(set(s))),
-              enzymes=("enzyme", lambda s: "; ".join(uniq(s))),
-              reactions=("reaction", lambda s: " || ".join(uniq(s)))
-          )
-          .sort_values("gene"))
+genes = df.groupby("gene")
+out = pd.DataFrame({
+    "n_reactions": genes["reaction"].nunique(),
+    "enzymes": joined_unique("enzyme", "; "),
+    "reactions": joined_unique("reaction", " || "),
+})
+out[["enzymes", "reactions"]] = out[["enzymes", "reactions"]].fillna("")
+out = out.rename_axis("gene").reset_index().sort_values("gene")
 
 out.to_csv("atp_reactions_for_requested_genes.csv", index=False)
 print(f"Wrote atp_reactions_for_requested_genes.csv with {len(out)} genes.")
 
 # Diagnostic check for missing genes
-all_input = {ln.strip().lower() for ln in open(GENES) if ln.strip()}
 found = set(out['gene'].str.lower().unique())
-missing = sorted(all_input - found)
+missing = sorted(targets - found)
 pd.DataFrame(missing, columns=['missing_gene']).to_csv("missing_genes.csv", index=False)
 print(len(missing), "genes not found. See missing_genes.csv for details.")
-
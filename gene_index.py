@@ -0,0 +1,159 @@
+"""
+Gene identifier index: every known name, synonym and b-number of an
+E. coli gene mapped to its canonical b-number.
+
+The index is built once from the iML1515.json gene entries (b-number,
+gene name and the annotation cross-references) and, optionally, from an
+EcoCyc gene table (names, "//"-separated synonyms, b-number accession).
+Keys are normalized the way enrichment_ATP_fixed.py cleaned names
+(lower case, stripped, " cds" / " protein" removed).
+
+Resolving a column normalizes and looks up each distinct value once and
+maps the codes back, so a join over millions of mutation rows costs one
+hash lookup per distinct name. A key claimed by several genes with the
+same priority is ambiguous: it is left out of the index and listed in
+GeneIndex.ambiguous rather than guessed.
+"""
+
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+# Lower value wins when a key is claimed by more than one gene
+PRIORITY = {"b_number": 0, "name": 1, "ecocyc": 2, "annotation": 3, "synonym": 4}
+ANNOTATIONS = ("ecogene", "asap", "uniprot", "ncbigene", "refseq_name", "refseq_locus_tag")
+
+
+def normalize(names: pd.Series) -> pd.Series:
+    """Vectorized clean_name: lower case, stripped, ' cds'/' protein' removed."""
+    return (
+        names.str.lower()
+        .str.strip()
+        .str.replace(" cds", "", regex=False)
+        .str.replace(" protein", "", regex=False)
+    )
+
+
+def model_identifiers(model_file: str = "iML1515.json") -> pd.DataFrame:
+    """(b_number, identifier, source) rows for every gene of a BiGG JSON model."""
+    with open(model_file) as f:
+        genes = json.load(f)["genes"]
+    rows = []
+    for g in genes:
+        rows.append((g["id"], g["id"], "b_number"))
+        if g.get("name"):
+            rows.append((g["id"], g["name"], "name"))
+        for key in ANNOTATIONS:
+            values = g.get("annotation", {}).get(key, [])
+            for v in [values] if isinstance(values, str) else values:
+                rows.append((g["id"], v, "annotation"))
+    return pd.DataFrame(rows, columns=["b_number", "identifier", "source"])
+
+
+def ecocyc_identifiers(path: str) -> pd.DataFrame:
+    """
+    (b_number, identifier, source) rows from an EcoCyc gene table (CSV or
+    TSV). Columns are matched loosely: one naming the b-number / accession
+    / locus, and optionally one with the gene name and one with synonyms.
+    """
+    df = pd.read_csv(path, sep=None, engine="python", dtype=str, keep_default_na=False)
+    df.columns = [c.strip().lower() for c in df.columns]
+    col_b = next((c for c in df.columns
+                  if any(k in c for k in ("b-number", "b_number", "accession", "locus"))), None)
+    if col_b is None:
+        raise ValueError("No b-number / accession column found.")
+    col_syn = next((c for c in df.columns if "synonym" in c), None)
+    col_name = next((c for c in df.columns if c != col_b and c != col_syn
+                     and ("name" in c or "gene" in c)), None)
+
+    b_numbers = df[col_b].str.extract(r"(b\d{4})", flags=re.IGNORECASE)[0].str.lower()
+    parts = []
+    if col_name:
+        parts.append(pd.DataFrame({"b_number": b_numbers, "identifier": df[col_name],
+                                   "source": "ecocyc"}))
+    if col_syn:
+        syn = pd.DataFrame({"b_number": b_numbers,
+                            "identifier": df[col_syn].str.split(r"\s*(?://|;|\|)\s*")})
+        parts.append(syn.explode("identifier").assign(source="synonym"))
+    out = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+        columns=["b_number", "identifier", "source"])
+    return out[out["b_number"].notna() & (out["identifier"].fillna("") != "")]
+
+
+class GeneIndex:
+    """Normalized identifier -> canonical b-number."""
+
+    def __init__(self, identifiers: pd.DataFrame):
+        df = identifiers.dropna(subset=["identifier"]).copy()
+        df["key"] = normalize(df["identifier"].astype(str))
+        df = df[df["key"] != ""]
+        df["rank"] = df["source"].map(PRIORITY)
+        best = df[df["rank"] == df.groupby("key")["rank"].transform("min")]
+        claims = best.drop_duplicates(["key", "b_number"])
+        n_claims = claims.groupby("key")["b_number"].transform("size")
+
+        amb = claims[n_claims > 1]
+        self.ambiguous = amb.groupby("key")["b_number"].agg(lambda s: "|".join(sorted(s)))
+        unique = claims[n_claims == 1]
+        self.lookup = pd.Series(unique["b_number"].to_numpy(), index=unique["key"].to_numpy())
+        names = df[df["source"] == "name"].drop_duplicates("b_number")
+        self.names = pd.Series(names["identifier"].to_numpy(), index=names["b_number"].to_numpy())
+
+    def __len__(self) -> int:
+        return len(self.lookup)
+
+    def _resolve_unique(self, values) -> tuple:
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+        keys = normalize(pd.Series(uniques, dtype=object).astype(str))
+        return codes, keys, keys.map(self.lookup)
+
+    def resolve(self, values, keep_unresolved: bool = False) -> pd.Series:
+        """
+        Canonical b-number for every entry of 'values' (aligned with it).
+        Unresolved entries are NaN, or their normalized name with
+        keep_unresolved=True (so they still count as distinct genes).
+        """
+        codes, keys, hits = self._resolve_unique(values)
+        if keep_unresolved:
+            hits = hits.fillna(keys)
+        out = np.append(hits.to_numpy(dtype=object), np.nan)[codes]
+        index = values.index if isinstance(values, pd.Series) else None
+        return pd.Series(out, index=index, dtype=object)
+
+    def unresolved(self, values) -> pd.DataFrame:
+        """Distinct values that did not resolve, with their row counts."""
+        codes, keys, hits = self._resolve_unique(values)
+        counts = np.bincount(codes[codes >= 0], minlength=len(keys))
+        missing = hits.isna().to_numpy()
+        df = pd.DataFrame({
+            "name": keys[missing].to_numpy(),
+            "ambiguous": keys[missing].isin(self.ambiguous.index).to_numpy(),
+            "rows": counts[missing],
+        })
+        return (df.groupby(["name", "ambiguous"], as_index=False)["rows"].sum()
+                .sort_values(["rows", "name"], ascending=[False, True], ignore_index=True))
+
+    def name(self, b_numbers) -> pd.Series:
+        """Model gene name for each b-number ("" if the gene has none)."""
+        return pd.Series(b_numbers, dtype=object).map(self.names).fillna("")
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({"key": self.lookup.index, "b_number": self.lookup.to_numpy()})
+
+
+def build_index(model_file: str = "iML1515.json", ecocyc_files=()) -> GeneIndex:
+    """Index over the model genes plus any EcoCyc gene tables."""
+    parts = [model_identifiers(model_file)]
+    parts += [ecocyc_identifiers(path) for path in ecocyc_files]
+    return GeneIndex(pd.concat(parts, ignore_index=True))
+
+
+if __name__ == "__main__":
+    import sys
+
+    index = build_index("iML1515.json", sys.argv[1:])  # optional EcoCyc gene tables
+    index.to_frame().to_csv("gene_index.csv", index=False)
+    print(f"Indexed {len(index)} identifiers; {len(index.ambiguous)} ambiguous keys left out.")
+    print("✅ Saved: gene_index.csv")
@@ -1,31 +1,37 @@
+import numpy as np
 import pandas as pd
-from scipy.stats import fisher_exact
+
+from enrichment_engine import event_level_test, gene_level_test, log_odds_ratios
+from meta_analysis import leave_one_out, meta_analysis
+from mutation_ingest import ingest
 
 TOTAL_GENES = 4448
 ATP_TOTAL = 225
 FILE = "fixed_SNP_bylines_with_ATPnew.csv"
 
-df = pd.read_csv(FILE, header=None, names=["line", "gene", "is_ATP_gene"])
-df["line"] = df["line"].astype(str).str.strip().str.lower().str.replace(" ", "")
-df["gene"] = df["gene"].astype(str).str.strip().str.lower()
-df["is_ATP_gene"] = df["is_ATP_gene"].astype(str).str.lower().isin(["true","t","1"])
+# Streamed in chunks: per-line counts plus the all-lines row, then
+# tested in one vectorized pass
+acc = ingest(FILE, preset="summary")
+counts = acc.counts()
+
+print("Detected lines:", sorted(counts.index), "\n")
 
-print("Detected lines:", sorted(df["line"].unique()), "\n")
+counts.loc["__all__"] = acc.totals()
+gene_stats = gene_level_test(counts["atp_genes"], counts["genes"], ATP_TOTAL, TOTAL_GENES)
+event_stats = event_level_test(counts["atp_events"], counts["events"], ATP_TOTAL, TOTAL_GENES)
+gene_stats.index = event_stats.index = counts.index
 
-for line, group in df.groupby("line", sort=True):
-    total_events = len(group)
-    atp_events = int(group["is_ATP_gene"].sum())
+for line in counts.index[:-1]:
+    total_events = counts.at[line, "events"]
+    atp_events = counts.at[line, "atp_events"]
     non_atp_events = total_events - atp_events
 
-    unique_genes = group.drop_duplicates(subset=["gene"])
-    a = int(unique_genes["is_ATP_gene"].sum())
-    c = len(unique_genes) - a
-    b = ATP_TOTAL - a
-    d = (TOTAL_GENES - ATP_TOTAL) - c
+    n_unique = counts.at[line, "genes"]
+    a = counts.at[line, "atp_genes"]
+    c = n_unique - a
 
-    odds_gene, p_gene = fisher_exact([[a,b],[c,d]])
-    odds_event, p_event = fisher_exact([[atp_events, non_atp_events],
-                                        [ATP_TOTAL, TOTAL_GENES - ATP_TOTAL]])
+    odds_gene, p_gene = gene_stats.loc[line, ["odds_ratio", "p_value"]]
+    odds_event, p_event = event_stats.loc[line, ["odds_ratio", "p_value"]]
 
     print(f"🧩 {line.upper()}")
     print("========================================")
@@ -35,7 +41,7 @@ for line, group in df.groupby("line", sort=True):
     print(f"  Non-ATP mutation events: {non_atp_events}\n")
 
     print("GENE-LEVEL DATA:")
-    print(f"  Total unique mutated genes: {len(unique_genes)}")
+    print(f"  Total unique mutated genes: {n_unique}")
     print(f"  ATP genes total: {ATP_TOTAL}")
     print(f"  ATP genes mutated: {a}")
     print(f"  Non-ATP genes mutated: {c}\n")
@@ -45,17 +51,13 @@ for line, group in df.groupby("line", sort=True):
     print(f"  Event-level enrichment: odds ratio = {odds_event:.2f},  p = {p_event:.3e}")
     print("========================================\n")
 
-total_all = len(df)
-atp_all = int(df["is_ATP_gene"].sum())
+total_all = counts.at["__all__", "events"]
+atp_all = counts.at["__all__", "atp_events"]
 non_atp_all = total_all - atp_all
-unique_all = df.drop_duplicates(subset=["gene"])
-a = int(unique_all["is_ATP_gene"].sum())
-c = len(unique_all) - a
-b = ATP_TOTAL - a
-d = (TOTAL_GENES - ATP_TOTAL) - c
-odds_gene_all, p_gene_all = fisher_exact([[a,b],[c,d]])
-odds_event_all, p_event_all = fisher_exact([[atp_all, non_atp_all],
-                                            [ATP_TOTAL, TOTAL_GENES - ATP_TOTAL]])
+a = counts.at["__all__", "atp_genes"]
+c = counts.at["__all__", "genes"] - a
+odds_gene_all, p_gene_all = gene_stats.loc["__all__", ["odds_ratio", "p_value"]]
+odds_event_all, p_event_all = event_stats.loc["__all__", ["odds_ratio", "p_value"]]
 
 print("🌍 ALL LINES COMBINED")
 print("========================================")
@@ -65,7 +67,7 @@ print(f"  ATP-consuming mutation events: {atp_all}")
 print(f"  Non-ATP mutation events: {non_atp_all}\n")
 
 print("GENE-LEVEL DATA:")
-print(f"  Total unique mutated genes: {len(unique_all)}")
+print(f"  Total unique mutated genes: {counts.at['__all__', 'genes']}")
 print(f"  ATP genes total: {ATP_TOTAL}")
 print(f"  ATP genes mutated: {a}")
 print(f"  Non-ATP genes mutated: {c}\n")
@@ -75,3 +77,32 @@ print(f"  Gene-level enrichment:  odds ratio = {odds_gene_all:.2f},  p = {p_gene
 print(f"  Event-level enrichment: odds ratio = {odds_event_all:.2f},  p = {p_event_all:.3e}")
 print("========================================")
 
+
+# === DerSimonian–Laird random-effects meta-analysis across lines ===
+lines = counts.drop(index="__all__")
+tables = {
+    "Gene-level": (lines["atp_genes"], ATP_TOTAL - lines["atp_genes"],
+                   lines["genes"] - lines["atp_genes"],
+                   (TOTAL_GENES - ATP_TOTAL) - (lines["genes"] - lines["atp_genes"])),
+    "Event-level": (lines["atp_events"], lines["events"] - lines["atp_events"],
+                    ATP_TOTAL, TOTAL_GENES - ATP_TOTAL),
+}
+
+print("\n🧮 RANDOM-EFFECTS META-ANALYSIS (DerSimonian–Laird)")
+print("========================================")
+loo = {}
+for level, (a, b, c, d) in tables.items():
+    meta = meta_analysis(a, b, c, d)
+    print(f"{level.upper()}:")
+    print(f"  Pooled odds ratio = {meta['odds_ratio']:.2f} "
+          f"(95% CI {meta['or_ci_low']:.2f}–{meta['or_ci_high']:.2f}; "
+          f"bootstrap {meta['or_boot_low']:.2f}–{meta['or_boot_high']:.2f})")
+    print(f"  95% prediction interval: {meta['or_pi_low']:.2f}–{meta['or_pi_high']:.2f}")
+    print(f"  tau² = {meta['tau2']:.3f},  I² = {100 * meta['I2']:.1f}%,  Q = {meta['Q']:.2f}\n")
+    y, v = log_odds_ratios(a, b, c, d)
+    loo[level] = leave_one_out(y, v, labels=lines.index)
+
+print("Leave-one-line-out pooled odds ratios:")
+print(pd.DataFrame({level: np.exp(df["mu"]).to_numpy() for level, df in loo.items()},
+                   index=lines.index).round(2))
+print("========================================")
@@ -1,47 +1,27 @@
-from scipy.stats import fisher_exact
 import pandas as pd
 
-# === Load and clean ===
-df = pd.read_csv("fixed_SNP_bylines_with_ATPnew.csv", header=None, skiprows=1,
-                 names=["line", "gene", "is_ATP_gene"])
-df["line"] = (
-    df["line"].astype(str)
-    .str.strip()
-    .str.lower()
-    .replace(r"\s+", " ", regex=True)
-    .replace("line ", "line_", regex=True)
-)
-df["gene"] = df["gene"].astype(str).str.strip().str.lower()
-df["is_ATP_gene"] = df["is_ATP_gene"].astype(str).str.lower().isin(["true", "t", "1"])
+from enrichment_engine import gene_level_test
+from mutation_ingest import ingest
+
+# === Stream, clean and count per line ===
+counts = ingest("fixed_SNP_bylines_with_ATPnew.csv", preset="fixed").counts()
 
 ATP_TOTAL = 225
 GENOME_TOTAL = 4448
 
-results = []
-
-# === Loop over lines ===
-for line, subset in df.groupby("line"):
-    total_mut = len(subset)
-    atp_mut = subset["is_ATP_gene"].sum()
-    non_atp_mut = total_mut - atp_mut
-
-    a = atp_mut
-    b = ATP_TOTAL - atp_mut
-    c = non_atp_mut
-    d = (GENOME_TOTAL - ATP_TOTAL) - non_atp_mut
-
-    odds, p = fisher_exact([[a, b], [c, d]])
+# === All lines in one vectorized pass ===
+stats = gene_level_test(counts["atp_events"], counts["events"], ATP_TOTAL, GENOME_TOTAL)
 
-    results.append({
-        "line": line,
-        "total_mutations": total_mut,
-        "atp_mutations": atp_mut,
-        "odds_ratio": odds,
-        "p_value": p
-    })
+results = pd.DataFrame({
+    "line": counts.index,
+    "total_mutations": counts["events"].to_numpy(),
+    "atp_mutations": counts["atp_events"].to_numpy(),
+    "odds_ratio": stats["odds_ratio"].to_numpy(),
+    "p_value": stats["p_value"].to_numpy(),
+})
 
 # === Output ===
-results_df = pd.DataFrame(results).sort_values("p_value", ascending=True)
+results_df = results.sort_values("p_value", ascending=True)
 print("\n📊 ATP ENRICHMENT BY LINE")
 print(results_df.round(4))
 results_df.to_csv("linewise_ATP_enrichment_fixed.csv", index=False)
@@ -0,0 +1,104 @@
+"""
+DerSimonian–Laird random-effects meta-analysis of per-line log odds ratios.
+
+dersimonian_laird works on the last axis of its inputs, so a stack of
+resampled sets of lines (bootstrap replicates, leave-one-line-out
+subsets) is pooled in a single array operation: a (n_boot, n_lines)
+array gives n_boot pooled estimates at once.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm, t
+
+from enrichment_engine import log_odds_ratios
+
+
+def dersimonian_laird(y, v, confidence: float = 0.95) -> dict:
+    """
+    Random-effects pooling of effects 'y' with within-line variances 'v'
+    along the last axis.
+
+    Returns a dict of arrays (scalars for 1-D input): mu, se, ci_low,
+    ci_high, tau2, Q, I2 and the prediction interval pi_low/pi_high
+    (t distribution with k - 2 df; nan for fewer than 3 lines).
+    """
+    y, v = np.broadcast_arrays(np.asarray(y, dtype=float), np.asarray(v, dtype=float))
+    k = y.shape[-1]
+    w = 1 / v
+    sw = w.sum(axis=-1)
+    mu_fixed = (w * y).sum(axis=-1) / sw
+    q = (w * (y - mu_fixed[..., None]) ** 2).sum(axis=-1)
+    c = sw - (w ** 2).sum(axis=-1) / sw
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # a single line has no between-line variance: fixed-effect estimate
+        tau2 = np.where(c > 0, np.maximum(0.0, (q - (k - 1)) / c), 0.0)
+        i2 = np.where(q > 0, np.maximum(0.0, (q - (k - 1)) / q), 0.0)
+
+    w_re = 1 / (v + tau2[..., None])
+    mu = (w_re * y).sum(axis=-1) / w_re.sum(axis=-1)
+    se = np.sqrt(1 / w_re.sum(axis=-1))
+    z = norm.ppf(0.5 + confidence / 2)
+    if k >= 3:
+        half_pi = t.ppf(0.5 + confidence / 2, k - 2) * np.sqrt(tau2 + se ** 2)
+    else:
+        half_pi = np.full_like(mu, np.nan)
+
+    out = {
+        "mu": mu, "se": se, "ci_low": mu - z * se, "ci_high": mu + z * se,
+        "tau2": tau2, "Q": q, "I2": i2,
+        "pi_low": mu - half_pi, "pi_high": mu + half_pi,
+    }
+    if y.ndim == 1:
+        out = {key: float(val) for key, val in out.items()}
+    return out
+
+
+def bootstrap(y, v, n_boot: int = 10_000, seed: int = 0,
+              confidence: float = 0.95) -> dict:
+    """
+    Percentile intervals for mu and tau2 from resampling lines with
+    replacement; all replicates are pooled in one dersimonian_laird call.
+    """
+    y, v = np.asarray(y, dtype=float), np.asarray(v, dtype=float)
+    idx = np.random.default_rng(seed).integers(len(y), size=(n_boot, len(y)))
+    boot = dersimonian_laird(y[idx], v[idx], confidence)
+    tails = [50 * (1 - confidence), 50 * (1 + confidence)]
+    mu_low, mu_high = np.percentile(boot["mu"], tails)
+    tau2_low, tau2_high = np.percentile(boot["tau2"], tails)
+    return {"mu_low": float(mu_low), "mu_high": float(mu_high),
+            "tau2_low": float(tau2_low), "tau2_high": float(tau2_high)}
+
+
+def leave_one_out(y, v, labels=None, confidence: float = 0.95) -> pd.DataFrame:
+    """Pooled estimates with each line left out in turn, one row per line."""
+    y, v = np.asarray(y, dtype=float), np.asarray(v, dtype=float)
+    k = len(y)
+    keep = ~np.eye(k, dtype=bool)
+    rows = dersimonian_laird(y[None, :].repeat(k, 0)[keep].reshape(k, k - 1),
+                             v[None, :].repeat(k, 0)[keep].reshape(k, k - 1),
+                             confidence)
+    df = pd.DataFrame(rows)
+    df.insert(0, "left_out", list(labels) if labels is not None else range(k))
+    return df
+
+
+def meta_analysis(a, b, c, d, n_boot: int = 10_000, seed: int = 0,
+                  correction: float = 0.5, confidence: float = 0.95) -> dict:
+    """
+    DerSimonian–Laird pooled odds ratio for the per-line tables
+    [[a, b], [c, d]] (continuity 'correction' for tables with a zero),
+    on the log scale plus exponentiated odds ratios, with bootstrap
+    percentile intervals when n_boot > 0.
+    """
+    y, v = log_odds_ratios(a, b, c, d, correction)
+    result = dersimonian_laird(y, v, confidence)
+    if n_boot:
+        result.update(bootstrap(y, v, n_boot, seed, confidence))
+    for key, name in (("mu", "odds_ratio"), ("ci_low", "or_ci_low"),
+                      ("ci_high", "or_ci_high"), ("pi_low", "or_pi_low"),
+                      ("pi_high", "or_pi_high"), ("mu_low", "or_boot_low"),
+                      ("mu_high", "or_boot_high")):
+        if key in result:
+            result[name] = float(np.exp(result[key]))
+    return result
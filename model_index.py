@@ -0,0 +1,88 @@
+"""
+Reaction and gene index of a BiGG JSON model, built in one pass.
+
+One walk over the reactions collects everything the ATP annotation
+scripts need: reaction -> metabolite coefficients, reaction -> bounds,
+reaction -> genes (b-numbers found in the gene_reaction_rule, as
+classify_atp_genes.py has always extracted them, or with gene_pattern=None
+every gene ID in the rule, for models of other organisms), gene ->
+reactions and reaction -> subsystem.
+Gene names come from one walk over the genes. All mappings keep model
+order, so outputs built from the index come out in the same order as
+loops over M["reactions"].
+"""
+
+import json
+import re
+from collections import defaultdict
+
+B_NUMBER = re.compile(r"b\d{4}")
+GPR_TOKEN = re.compile(r"[^\s()]+")
+
+
+def _rule_genes(rule: str) -> list:
+    return [t for t in GPR_TOKEN.findall(rule) if t not in ("and", "or")]
+
+
+class ModelIndex:
+    """Single-pass index over a parsed BiGG JSON model."""
+
+    def __init__(self, model: dict, gene_pattern=B_NUMBER):
+        self.id = model.get("id", "unknown")
+        self.metabolites = {}                  # reaction -> {metabolite: coefficient}
+        self.bounds = {}                       # reaction -> (lower, upper)
+        self.genes = {}                        # reaction -> genes (rule order)
+        self.subsystem = {}                    # reaction -> subsystem
+        self.gene_reactions = defaultdict(list)  # gene -> reactions (model order)
+        for rxn in model.get("reactions", []):
+            rxn_id = rxn["id"]
+            self.metabolites[rxn_id] = rxn.get("metabolites", {})
+            self.bounds[rxn_id] = (rxn.get("lower_bound", 0.0), rxn.get("upper_bound", 1000.0))
+            self.subsystem[rxn_id] = rxn.get("subsystem", "Unknown")
+            rule = rxn.get("gene_reaction_rule", "")
+            genes = gene_pattern.findall(rule) if gene_pattern is not None else _rule_genes(rule)
+            self.genes[rxn_id] = genes
+            for g in genes:
+                reactions = self.gene_reactions[g]
+                if not reactions or reactions[-1] != rxn_id:
+                    reactions.append(rxn_id)
+
+        model_genes = model.get("genes", [])
+        self.n_genes = len(model_genes)
+        self.gene_name = {g["id"]: g.get("name", "") for g in model_genes}
+
+    @classmethod
+    def from_json(cls, path: str, gene_pattern=B_NUMBER) -> "ModelIndex":
+        with open(path) as f:
+            return cls(json.load(f), gene_pattern)
+
+    @classmethod
+    def from_file(cls, path: str, gene_pattern=B_NUMBER) -> "ModelIndex":
+        """JSON directly; SBML (.xml / .sbml) through cobra's reader."""
+        if path.endswith(".json"):
+            return cls.from_json(path, gene_pattern)
+        import cobra
+
+        return cls(cobra.io.model_to_dict(cobra.io.read_sbml_model(path)), gene_pattern)
+
+    @property
+    def n_reactions(self) -> int:
+        return len(self.metabolites)
+
+    def consumes_atp(self, rxn_id: str) -> bool:
+        """ATP-consuming as classify_atp_genes.py defines it: atp_c and adp_c both present."""
+        stoich = self.metabolites[rxn_id]
+        return "atp_c" in stoich and "adp_c" in stoich
+
+    def atp_reactions(self) -> list:
+        return [r for r in self.metabolites if self.consumes_atp(r)]
+
+    def genes_of(self, reactions) -> dict:
+        """{b-number: reactions among 'reactions'}, genes in first-seen order."""
+        out = {}
+        for rxn_id in reactions:
+            for g in self.genes[rxn_id]:
+                rxns = out.setdefault(g, [])
+                if not rxns or rxns[-1] != rxn_id:
+                    rxns.append(rxn_id)
+        return out
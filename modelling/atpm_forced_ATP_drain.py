@@ -16,10 +16,13 @@ import cobra
 import numpy as np
 import pandas as pd
 
+from model_cache import load_cached_model
+from sweep_engine import run_sweep
+
 
 def load_buchnera_model(path: str = "iLG240.xml") -> cobra.Model:
-    """Load the Buchnera iLG240 model from an SBML file."""
-    return cobra.io.read_sbml_model(path)
+    """Load the Buchnera iLG240 model from an SBML file (cached)."""
+    return load_cached_model(path)
 
 
 def main():
@@ -37,30 +40,16 @@ def main():
     if atpm is None:
         raise ValueError("ATPM reaction not found in the model!")
 
-    # Store baseline ATPM lower bound
-    baseline_lb = atpm.lower_bound
-
     # Forced ATP drain values
     loads = [0, 5, 10, 20, 40, 80, 160, 300, 600, 1000]
 
-    results = []
-
-    for lb in loads:
-        m = model.copy()
-        r = m.reactions.get_by_id(atpm.id)
-
-        # Reset ATPM to baseline
-        r.lower_bound = baseline_lb
-
-        # Apply new forced ATP drain
-        r.lower_bound = lb
-
-        sol = m.optimize()
-        growth = sol.objective_value if sol.status == "optimal" else 0.0
+    def force_atp_drain(m: cobra.Model, lb: float) -> None:
+        # The bound is reverted to baseline by the sweep engine
+        m.reactions.get_by_id(atpm.id).lower_bound = lb
 
-        results.append({"ATPM_forced": lb, "growth": growth})
+    results = run_sweep(model, loads, force_atp_drain, key="ATPM_forced")
 
-    df = pd.DataFrame(results)
+    df = pd.DataFrame(results)[["ATPM_forced", "growth"]]
     df.to_csv("buchnera_ATPM_sweep.csv", index=False)
     print(df)
 
@@ -0,0 +1,187 @@
+"""
+benchmark_sweeps.py
+
+Benchmark the phases of the modelling sweeps and flag regressions.
+
+For every model (iML1515, iLG240) whose SBML file is present, this times
+ - load_sbml        parsing the SBML file
+ - load_cached      loading through model_cache (cache already warm)
+ - copy             model.copy(), as the original per-point sweeps did
+ - apply_*          one ATPΔ / ATPM / salvage perturbation, applied and
+                    reverted (add_metabolites-based and direct-write ΔATP)
+ - sweep_copy       the original copy-apply-optimize loop, per point
+ - sweep/<solver>/* the warm-started ΔATP and ATPM grids, per point, for
+                    every LP solver cobra can use here
+
+Each timing is the median of --repeat runs, in seconds. Results are
+written as JSON; with --baseline they are compared to an earlier run and
+any phase slower than baseline × (1 + --threshold) is reported, with a
+non-zero exit status.
+
+    python benchmark_sweeps.py --save benchmark_baseline.json
+    python benchmark_sweeps.py --baseline benchmark_baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import cobra
+from cobra.util.solver import solvers
+
+from ecoli_salvage_modes import (
+    ATP_DELTA_VALUES, ATPM_VALUES, HIGH_SALVAGE, set_atp_delta, set_salvage,
+)
+from parallel_sweep import MODEL_FILES, load_model, make_perturbation
+from sweep_engine import run_sweep
+
+LP_SOLVERS = ("glpk", "cplex", "gurobi", "hybrid", "scipy")
+
+# The grids the sweep scripts run: iML1515 from ecoli_salvage_modes,
+# iLG240 from biomass_ATP_sweep (ΔATP) and atpm_forced_ATP_drain (ATPM)
+GRIDS = {
+    "iML1515": {"atp_delta": ATP_DELTA_VALUES, "atpm": ATPM_VALUES},
+    "iLG240": {
+        "atp_delta": [0, 5, 10, 20, 50, 80, 100, 160, 200, 250, 300,
+                      400, 500, 600, 700, 800, 900, 1000],
+        "atpm": [0, 5, 10, 20, 40, 80, 160, 300, 600, 1000],
+    },
+}
+
+
+def _median_time(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def _applied(model: cobra.Model, perturb, value):
+    def run():
+        with model:
+            perturb(model, value)
+    return run
+
+
+def benchmark_model(model_key: str, path: str, repeat: int) -> dict:
+    """Time every phase for one model; returns {phase: seconds}."""
+    results = {"load_sbml": _median_time(lambda: cobra.io.read_sbml_model(path), repeat)}
+
+    load_model(model_key, path)  # make sure the cache is warm
+    results["load_cached"] = _median_time(lambda: load_model(model_key, path), repeat)
+
+    model, orig = load_model(model_key, path)
+    model.slim_optimize()
+    results["copy"] = _median_time(model.copy, repeat)
+
+    atpm = make_perturbation(model_key, "atpm", model, orig)
+    direct = make_perturbation(model_key, "atp_delta", model, orig)
+    if model_key == "iLG240":
+        from biomass_ATP_sweep import set_atp_load
+        add_metabolites = lambda m, d: set_atp_load(m, orig, d)
+    else:
+        add_metabolites = set_atp_delta
+
+    results["apply_atp_delta_add_metabolites"] = _median_time(
+        _applied(model, add_metabolites, 100), repeat)
+    results["apply_atp_delta_direct"] = _median_time(_applied(model, direct, 100), repeat)
+    results["apply_atpm"] = _median_time(_applied(model, atpm, 100), repeat)
+    results["apply_salvage"] = _median_time(_applied(model, set_salvage, HIGH_SALVAGE), repeat)
+
+    # The original approach: copy, perturb and optimize for every point
+    def copy_point():
+        m = model.copy()
+        add_metabolites(m, 100)
+        m.optimize()
+    results["sweep_copy"] = _median_time(copy_point, repeat)
+
+    available = [s for s in LP_SOLVERS if s in solvers]
+    for solver in available:
+        m = model.copy()
+        try:
+            m.solver = solver
+        except Exception:  # solver importable but not licensed/usable
+            continue
+        m.slim_optimize()
+        for grid, values in GRIDS[model_key].items():
+            perturb = make_perturbation(model_key, grid, m, orig)
+            total = _median_time(lambda: run_sweep(m, values, perturb), repeat)
+            results[f"sweep/{solver}/{grid}"] = total / len(values)
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_seconds: float) -> list:
+    """Return (name, baseline, current) for every regressed timing."""
+    regressions = []
+    for model_key, timings in current["results"].items():
+        base = baseline.get("results", {}).get(model_key, {})
+        for phase, seconds in timings.items():
+            if phase not in base:
+                continue
+            if seconds > base[phase] * (1 + threshold) and seconds - base[phase] > min_seconds:
+                regressions.append((f"{model_key}/{phase}", base[phase], seconds))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--models", nargs="+", choices=list(MODEL_FILES),
+                        default=list(MODEL_FILES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--save", help="also write the results as a new baseline")
+    parser.add_argument("--baseline", help="compare against this baseline file")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed relative slowdown (default 0.25)")
+    parser.add_argument("--min-seconds", type=float, default=1e-4,
+                        help="ignore absolute slowdowns below this")
+    args = parser.parse_args(argv)
+
+    current = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cobra": cobra.__version__,
+            "machine": platform.machine(),
+            "solvers": sorted(solvers),
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+    for model_key in args.models:
+        path = MODEL_FILES[model_key]
+        if not os.path.exists(path):
+            print(f"Skipping {model_key}: {path} not found")
+            continue
+        print(f"Benchmarking {model_key} ...")
+        current["results"][model_key] = benchmark_model(model_key, path, args.repeat)
+        for phase, seconds in current["results"][model_key].items():
+            print(f"  {phase:<40s} {seconds * 1000:10.3f} ms")
+
+    for path in filter(None, [args.out, args.save]):
+        with open(path, "w") as f:
+            json.dump(current, f, indent=2)
+    print(f"\nWrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold, args.min_seconds)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) vs {args.baseline}:")
+            for name, base, now in regressions:
+                print(f"  {name:<48s} {base * 1000:10.3f} -> {now * 1000:10.3f} ms")
+            return 1
+        print(f"\nNo regressions vs {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,11 +13,13 @@ import cobra
 import numpy as np
 import pandas as pd
 
+from model_cache import load_cached_model
+from sweep_engine import HYDROLYSIS, BiomassATPCost, run_sweep
+
 
 def load_buchnera_model(path: str = "iLG240.xml") -> cobra.Model:
-    """Load the Buchnera iLG240 model from an SBML file."""
-    model = cobra.io.read_sbml_model(path)
-    return model
+    """Load the Buchnera iLG240 model from an SBML file (cached)."""
+    return load_cached_model(path)
 
 
 def get_original_atp_coeffs(biomass_rxn: cobra.Reaction, model: cobra.Model) -> dict:
@@ -82,17 +84,12 @@ def main():
     # ΔATP values to test
     loads = [0, 5, 10, 20, 50, 80, 100, 160, 200, 250, 300, 400, 500, 600, 700, 800, 900, 1000]
 
-    results = []
-
-    for d in loads:
-        # Work on a fresh copy each time for safety
-        m_copy = model.copy()
-        set_atp_load(m_copy, orig, d)
-        sol = m_copy.optimize()
-        growth = sol.objective_value if sol.status == "optimal" else 0.0
-        results.append({"delta_ATP": d, "growth": growth})
+    # One warm-started model; each ΔATP is written directly into the LP
+    # (checked against 'orig') and reverted after its solve
+    atp_load = BiomassATPCost(model, "BIOMASS", HYDROLYSIS, orig=orig)
+    results = run_sweep(model, loads, atp_load, key="delta_ATP")
 
-    df = pd.DataFrame(results)
+    df = pd.DataFrame(results)[["delta_ATP", "growth"]]
     df.to_csv("buchnera_biomass_ATP_sweep.csv", index=False)
     print(df)
 
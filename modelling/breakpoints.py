@@ -0,0 +1,271 @@
+"""
+breakpoints.py
+
+Adaptive, exact growth-vs-ATP-load curves from parametric LP information.
+
+ATPM sweep
+    Maximal growth as a function of the ATPM lower bound x is the value
+    function of an LP in a right-hand side, so it is concave and
+    piecewise linear. The dual value of the ATPM flux at an optimum is a
+    supergradient (slope) of that curve. Tangents at the two ends of an
+    interval either already explain the curve there (one linear piece),
+    meet at a breakpoint, or point to where the interval must be split.
+    Every breakpoint is found exactly with a few LP solves per linear
+    piece, instead of a dense grid. The maximum sustainable ATPM is one
+    more LP: maximise ATPM flux itself.
+
+ΔATP sweep
+    Adding ΔATP hydrolysis per unit biomass (set_atp_delta) is the same as
+    forcing an extra Δ·μ of flux through a drain with the same ATP terms,
+    at growth rate μ. The growth-vs-drain curve g(x) is again piecewise
+    linear, and on a piece g(x) = α + β·x we get μ(Δ) = α / (1 - β·Δ). The
+    ΔATP curve is therefore known exactly, in closed form, from the
+    breakpoints of a temporary drain reaction whose stoichiometry matches
+    the biomass perturbation term for term.
+"""
+
+import math
+from typing import Optional
+
+import cobra
+import numpy as np
+import pandas as pd
+
+from sweep_engine import ATP_DELTA_TERMS
+
+
+def _find_atpm(model: cobra.Model) -> cobra.Reaction:
+    for r in model.reactions:
+        if r.id.lower() == "atpm":
+            return r
+    raise ValueError("ATPM reaction not found in the model!")
+
+
+def _evaluate(model: cobra.Model, rxn: cobra.Reaction, x: float) -> Optional[tuple]:
+    """Return (growth, slope d growth / d x) at lower bound x, or None."""
+    rxn.lower_bound = x
+    growth = model.slim_optimize(error_value=float("nan"))
+    if model.solver.status != "optimal":
+        return None
+    # The forward variable's dual is the slope w.r.t. its lower bound.
+    # (Reaction.reduced_cost subtracts the reverse variable's dual too.)
+    return growth, rxn.forward_variable.dual
+
+
+def max_sustainable_flux(model: cobra.Model, rxn: cobra.Reaction) -> float:
+    """Largest flux 'rxn' can carry (growth may drop to zero)."""
+    with model:
+        model.objective = rxn
+        value = model.slim_optimize(error_value=float("nan"))
+        if model.solver.status != "optimal":
+            raise ValueError(f"Cannot maximise {rxn.id}: {model.solver.status}")
+    return value
+
+
+def max_sustainable_atpm(model: cobra.Model, atpm_id: Optional[str] = None) -> float:
+    """Largest ATPM flux the model can carry (growth may drop to zero)."""
+    atpm = model.reactions.get_by_id(atpm_id) if atpm_id else _find_atpm(model)
+    return max_sustainable_flux(model, atpm)
+
+
+def atpm_breakpoints(
+    model: cobra.Model,
+    lo: Optional[float] = None,
+    hi: Optional[float] = None,
+    atpm_id: Optional[str] = None,
+    tol: float = 1e-7,
+    max_solves: int = 500,
+) -> tuple:
+    """
+    Find the breakpoints of growth vs the ATPM lower bound on [lo, hi].
+
+    lo defaults to the current ATPM lower bound, hi to the maximum
+    sustainable ATPM. Returns (curve, n_solves), where curve is a
+    DataFrame of (ATPM, growth) vertices sorted by ATPM; linear
+    interpolation between them is the exact curve (see interpolate).
+    The model is left unchanged.
+    """
+    atpm = model.reactions.get_by_id(atpm_id) if atpm_id else _find_atpm(model)
+    curve, n_solves = lower_bound_breakpoints(model, atpm, lo, hi, tol, max_solves)
+    return curve.rename(columns={"flux": "ATPM"}), n_solves
+
+
+def lower_bound_breakpoints(
+    model: cobra.Model,
+    rxn: cobra.Reaction,
+    lo: Optional[float] = None,
+    hi: Optional[float] = None,
+    tol: float = 1e-7,
+    max_solves: int = 500,
+) -> tuple:
+    """
+    Breakpoints of growth vs the lower bound of 'rxn' on [lo, hi].
+
+    Returns (curve, n_solves), with curve columns 'flux' and 'growth'.
+    """
+    lo = rxn.lower_bound if lo is None else lo
+    hi = max_sustainable_flux(model, rxn) if hi is None else hi
+    n_solves = 1
+
+    with model:
+        points = {}
+
+        def point(x):
+            nonlocal n_solves
+            if x not in points:
+                n_solves += 1
+                res = _evaluate(model, rxn, x)
+                if res is None:
+                    raise ValueError(f"Infeasible at {rxn.id} = {x}")
+                points[x] = res
+            return points[x]
+
+        def close(a, b):
+            return abs(a - b) <= tol * max(1.0, abs(a), abs(b))
+
+        vertices = {lo, hi}
+        stack = [(lo, hi)]
+        while stack:
+            a, b = stack.pop()
+            if b - a <= tol * max(1.0, abs(b)):
+                continue
+            (ga, sa), (gb, sb) = point(a), point(b)
+
+            # One linear piece: the tangent at a passes through (b, gb)
+            if close(ga + sa * (b - a), gb) or close(gb - sb * (b - a), ga):
+                continue
+
+            secant = (gb - ga) / (b - a)
+            if n_solves >= max_solves:
+                raise RuntimeError("max_solves reached before the curve was resolved")
+            if sa - sb <= 0 or not (sa + tol >= secant >= sb - tol):
+                # Slopes inconsistent with concavity (e.g. a degenerate
+                # dual): fall back to bisection.
+                m = 0.5 * (a + b)
+            else:
+                m = (gb - ga + sa * a - sb * b) / (sa - sb)
+                if not a < m < b:
+                    m = 0.5 * (a + b)
+            gm, _ = point(m)
+            vertices.add(m)
+            if close(ga + sa * (m - a), gm) and close(gb + sb * (m - b), gm):
+                continue  # m is the breakpoint between two linear pieces
+            stack.extend([(a, m), (m, b)])
+
+    xs = sorted(vertices)
+    curve = pd.DataFrame({"flux": xs, "growth": [points[x][0] for x in xs]})
+    return _drop_collinear(curve, "flux", tol), n_solves
+
+
+def _drop_collinear(curve: pd.DataFrame, xcol: str, tol: float) -> pd.DataFrame:
+    """Keep only vertices where the slope actually changes."""
+    x = curve[xcol].to_numpy()
+    y = curve["growth"].to_numpy()
+    if len(x) <= 2:
+        return curve.reset_index(drop=True)
+    slopes = np.diff(y) / np.diff(x)
+    keep = np.ones(len(x), dtype=bool)
+    keep[1:-1] = ~np.isclose(slopes[1:], slopes[:-1], rtol=1e-6, atol=tol)
+    return curve[keep].reset_index(drop=True)
+
+
+def interpolate(curve: pd.DataFrame, values, xcol: str = "ATPM") -> np.ndarray:
+    """Evaluate an exact piecewise-linear curve at arbitrary values."""
+    return np.interp(values, curve[xcol], curve["growth"])
+
+
+def atp_delta_curve(
+    model: cobra.Model,
+    deltas,
+    terms: Optional[dict] = None,
+    min_growth: float = 1e-3,
+    tol: float = 1e-7,
+) -> dict:
+    """
+    Exact growth vs ΔATP from drain-flux breakpoints (see module docstring).
+
+    'terms' are the metabolite coefficients added to the biomass reaction
+    per unit ΔATP (default ATP_DELTA_TERMS, i.e. set_atp_delta; use
+    sweep_engine.HYDROLYSIS for the sweeps that also consume water).
+
+    Returns a dict with
+      'growth'       : DataFrame of (delta_ATP, growth) at 'deltas'
+      'breakpoints'  : DataFrame of the ΔATP values where the curve
+                       changes its rational piece, with their growth
+      'max_delta'    : largest ΔATP that keeps growth >= min_growth
+      'n_solves'     : number of LP solves used
+    """
+    terms = ATP_DELTA_TERMS if terms is None else terms
+    with model:
+        # Biomass ATP demand is unbounded, so its stand-in drain is too
+        drain = cobra.Reaction("ATP_DELTA_DRAIN", lower_bound=0, upper_bound=math.inf)
+        model.add_reactions([drain])
+        drain.add_metabolites(
+            {model.metabolites.get_by_id(k): v for k, v in terms.items()}
+        )
+        curve, n_solves = lower_bound_breakpoints(model, drain, lo=0.0, tol=tol)
+
+    x = curve["flux"].to_numpy()  # extra ATP hydrolysis per unit time
+    g = curve["growth"].to_numpy()
+
+    def solve(delta):
+        # Fixed point μ = g(Δμ) on the piece containing Δμ
+        for i in range(len(x) - 1):
+            beta = (g[i + 1] - g[i]) / (x[i + 1] - x[i])
+            alpha = g[i] - beta * x[i]
+            mu = alpha / (1 - beta * delta)
+            if delta * mu <= x[i + 1] + tol or i == len(x) - 2:
+                return max(mu, 0.0)
+        return g[0]
+
+    growth = pd.DataFrame({"delta_ATP": list(deltas)})
+    growth["growth"] = [solve(d) for d in growth["delta_ATP"]]
+
+    positive = g > tol
+    breakpoints = pd.DataFrame(
+        {"delta_ATP": x[positive] / g[positive], "growth": g[positive]}
+    )
+
+    # Δ at which μ = min_growth: drain flux x* with g(x*) = min_growth
+    if g[-1] >= min_growth:
+        max_delta = math.inf
+    else:
+        x_star = np.interp(min_growth, g[::-1], x[::-1])
+        max_delta = x_star / min_growth
+
+    return {
+        "growth": growth,
+        "breakpoints": breakpoints,
+        "max_delta": max_delta,
+        "n_solves": n_solves,
+    }
+
+
+def main():
+    from ecoli_salvage_modes import (
+        ATP_DELTA_VALUES, ATPM_VALUES, HIGH_SALVAGE, LOW_SALVAGE,
+        load_ecoli_model, set_salvage,
+    )
+
+    model_ec = load_ecoli_model("iML1515.xml")
+
+    for name, flux in [("LOW", LOW_SALVAGE), ("HIGH", HIGH_SALVAGE)]:
+        with model_ec:
+            set_salvage(model_ec, flux)
+            curve, n_atpm = atpm_breakpoints(model_ec, lo=min(ATPM_VALUES))
+            delta = atp_delta_curve(model_ec, ATP_DELTA_VALUES)
+
+        curve.to_csv(f"breakpoints_atpm_{name.lower()}_salvage.csv", index=False)
+        delta["growth"].to_csv(f"atpdelta_curve_{name.lower()}_salvage.csv", index=False)
+
+        print(f"\n=== {name} salvage ===")
+        print(f"ATPM breakpoints ({n_atpm} LP solves):")
+        print(curve)
+        print(f"Max sustainable ATPM: {curve['ATPM'].iloc[-1]:.4f}")
+        print(f"\nATP Δ curve ({delta['n_solves']} LP solves):")
+        print(delta["growth"])
+        print(f"Max ΔATP with growth >= 1e-3: {delta['max_delta']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,11 @@
-import cobra
+from ecoli_salvage_modes import load_ecoli_model
+from sweep_engine import run_sweep
 
 # ---------------------------------------------------
-# 1. Load E. coli model
+# 1-2. Load E. coli model with core biomass objective and
+#      minimal medium (cached; same preset as ecoli_salvage_modes)
 # ---------------------------------------------------
-model = cobra.io.read_sbml_model("iML1515.xml")
-
-# Core biomass
-biomass = model.reactions.get_by_id("BIOMASS_Ec_iML1515_core_75p37M")
-model.objective = biomass
-
-# ---------------------------------------------------
-# 2. Set minimal medium (same as other script)
-# ---------------------------------------------------
-for ex in model.exchanges:
-    ex.lower_bound = 0.0
-
-minimal = [
-    "EX_glc__D_e",
-    "EX_nh4_e",
-    "EX_pi_e",
-    "EX_so4_e",
-    "EX_h2o_e",
-    "EX_h_e",
-    "EX_k_e",
-    "EX_na1_e",
-    "EX_cl_e",
-    "EX_mg2_e",
-    "EX_ca2_e",
-    "EX_fe2_e",
-    "EX_mn2_e",
-    "EX_zn2_e",
-    "EX_cobalt2_e",
-    "EX_mobd_e",
-    "EX_cu2_e",
-    "EX_ni2_e",
-    "EX_o2_e"
-]
-
-for ex_id in minimal:
-    if ex_id in model.reactions:
-        model.reactions.get_by_id(ex_id).lower_bound = -1000
-
-model.reactions.EX_glc__D_e.lower_bound = -10
+model = load_ecoli_model("iML1515.xml")
 
 print("Baseline growth:", model.optimize().objective_value)
 
@@ -49,14 +13,14 @@ print("Baseline growth:", model.optimize().objective_value)
 # 3. ATPM drain analysis
 # ---------------------------------------------------
 demands = [0,5,10,20,40,80,160,300,600,1000]
-results = {}
 
-for d in demands:
-    m = model.copy()
-    atpm = m.reactions.get_by_id("ATPM")
-    atpm.lower_bound = d
-    sol = m.optimize()
-    results[d] = (sol.status, sol.objective_value)
+def set_atpm(m, d):
+    m.reactions.get_by_id("ATPM").lower_bound = d
+
+
+# One warm-started model; the ATPM bound is reverted after each solve
+results = {row["value"]: (row["status"], row["growth"])
+           for row in run_sweep(model, demands, set_atpm)}
 
 print("\nATPM minimal medium results (E. coli):")
 print(results)
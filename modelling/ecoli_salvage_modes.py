@@ -18,37 +18,52 @@ Output:
  - results_high_salvage_atpm
 """
 
-import cobra
+from model_cache import load_cached_model
+from sweep_engine import ATP_DELTA_TERMS, BiomassATPCost, run_sweep
 
-# ------------------------------------------------------------
-# Load and configure WT E. coli iML1515
-# ------------------------------------------------------------
-
-model_ec = cobra.io.read_sbml_model("iML1515.xml")
-
-# Set biomass objective
-biomass = model_ec.reactions.get_by_id("BIOMASS_Ec_iML1515_core_75p37M")
-model_ec.objective = biomass
-
-# Close all exchange reactions
-for ex in model_ec.exchanges:
-    ex.lower_bound = 0.0
+BIOMASS_ID = "BIOMASS_Ec_iML1515_core_75p37M"
 
 # Minimal medium components
-minimal_media = [
+MINIMAL_MEDIA = [
     "EX_glc__D_e", "EX_nh4_e", "EX_pi_e", "EX_so4_e",
     "EX_h2o_e", "EX_h_e", "EX_k_e", "EX_na1_e", "EX_cl_e",
     "EX_mg2_e", "EX_ca2_e", "EX_fe2_e", "EX_mn2_e", "EX_zn2_e",
     "EX_cobalt2_e", "EX_mobd_e", "EX_cu2_e", "EX_ni2_e", "EX_o2_e"
 ]
 
-# Open minimal components
-for ex_id in minimal_media:
-    if ex_id in model_ec.reactions:
-        model_ec.reactions.get_by_id(ex_id).lower_bound = -1000
 
-# Limit glucose uptake
-model_ec.reactions.EX_glc__D_e.lower_bound = -10
+# ------------------------------------------------------------
+# Load and configure WT E. coli iML1515
+# ------------------------------------------------------------
+
+def configure_minimal_medium(model_ec):
+    """
+    Set the core biomass objective and apply the glucose-limited
+    minimal medium.
+    """
+    # Set biomass objective
+    biomass = model_ec.reactions.get_by_id(BIOMASS_ID)
+    model_ec.objective = biomass
+
+    # Close all exchange reactions
+    for ex in model_ec.exchanges:
+        ex.lower_bound = 0.0
+
+    # Open minimal components
+    for ex_id in MINIMAL_MEDIA:
+        if ex_id in model_ec.reactions:
+            model_ec.reactions.get_by_id(ex_id).lower_bound = -1000
+
+    # Limit glucose uptake
+    model_ec.reactions.EX_glc__D_e.lower_bound = -10
+
+
+def load_ecoli_model(path="iML1515.xml"):
+    """
+    Load iML1515 with the minimal medium applied, through the model cache.
+    """
+    return load_cached_model(path, preset=configure_minimal_medium,
+                             params=(BIOMASS_ID, tuple(MINIMAL_MEDIA)))
 
 
 # ------------------------------------------------------------
@@ -60,7 +75,7 @@ def set_atp_delta(model, delta_atp):
     Injects an increased ATP cost into the biomass equation.
     delta_atp = number of ATP required per unit biomass.
     """
-    biomass_rxn = model.reactions.get_by_id("BIOMASS_Ec_iML1515_core_75p37M")
+    biomass_rxn = model.reactions.get_by_id(BIOMASS_ID)
     biomass_rxn.add_metabolites({
         model.metabolites.atp_c: -delta_atp,
         model.metabolites.adp_c: +delta_atp,
@@ -103,73 +118,54 @@ ATPM_VALUES = [0, 10, 20, 30, 50, 80, 100, 150, 200, 250, 300]
 
 
 # ------------------------------------------------------------
-# Run ATPΔ under LOW salvage
+# Sweeps (one warm-started model, perturbations reverted per point)
 # ------------------------------------------------------------
 
-results_low_salvage_atpdelta = {}
+def _growth_by_value(rows):
+    return {row["value"]: row["growth"] for row in rows}
 
-for d in ATP_DELTA_VALUES:
-    m = model_ec.copy()
-    set_salvage(m, LOW_SALVAGE)
-    set_atp_delta(m, d)
-    sol = m.optimize()
-    results_low_salvage_atpdelta[d] = sol.objective_value
 
-
-# ------------------------------------------------------------
-# Run ATPΔ under HIGH salvage
-# ------------------------------------------------------------
-
-results_high_salvage_atpdelta = {}
-
-for d in ATP_DELTA_VALUES:
-    m = model_ec.copy()
-    set_salvage(m, HIGH_SALVAGE)
-    set_atp_delta(m, d)
-    sol = m.optimize()
-    results_high_salvage_atpdelta[d] = sol.objective_value
-
-
-# ------------------------------------------------------------
-# Run ATPM under LOW salvage
-# ------------------------------------------------------------
-
-results_low_salvage_atpm = {}
-
-for a in ATPM_VALUES:
-    m = model_ec.copy()
-    set_salvage(m, LOW_SALVAGE)
-    set_atpm(m, a)
-    sol = m.optimize()
-    results_low_salvage_atpm[a] = sol.objective_value
+def run_salvage_sweeps(model_ec):
+    """
+    Run the ATPΔ and ATPM sweeps under LOW and HIGH salvage.
+    Returns a dict of {sweep name: {value: growth}}.
+    """
+    low = lambda m: set_salvage(m, LOW_SALVAGE)
+    high = lambda m: set_salvage(m, HIGH_SALVAGE)
+    # Same terms as set_atp_delta, written straight into the LP
+    atp_delta = BiomassATPCost(model_ec, BIOMASS_ID, ATP_DELTA_TERMS)
+    return {
+        "results_low_salvage_atpdelta": _growth_by_value(
+            run_sweep(model_ec, ATP_DELTA_VALUES, atp_delta, setup=low)),
+        "results_high_salvage_atpdelta": _growth_by_value(
+            run_sweep(model_ec, ATP_DELTA_VALUES, atp_delta, setup=high)),
+        "results_low_salvage_atpm": _growth_by_value(
+            run_sweep(model_ec, ATPM_VALUES, set_atpm, setup=low)),
+        "results_high_salvage_atpm": _growth_by_value(
+            run_sweep(model_ec, ATPM_VALUES, set_atpm, setup=high)),
+    }
 
 
 # ------------------------------------------------------------
-# Run ATPM under HIGH salvage
+# Print summary to console (or save to file)
 # ------------------------------------------------------------
 
-results_high_salvage_atpm = {}
+def main():
+    model_ec = load_ecoli_model("iML1515.xml")
+    results = run_salvage_sweeps(model_ec)
 
-for a in ATPM_VALUES:
-    m = model_ec.copy()
-    set_salvage(m, HIGH_SALVAGE)
-    set_atpm(m, a)
-    sol = m.optimize()
-    results_high_salvage_atpm[a] = sol.objective_value
+    print("\n=== ATP Δ under LOW salvage ===")
+    print(results["results_low_salvage_atpdelta"])
 
+    print("\n=== ATP Δ under HIGH salvage ===")
+    print(results["results_high_salvage_atpdelta"])
 
-# ------------------------------------------------------------
-# Print summary to console (or save to file)
-# ------------------------------------------------------------
-
-print("\n=== ATP Δ under LOW salvage ===")
-print(results_low_salvage_atpdelta)
+    print("\n=== ATPM under LOW salvage ===")
+    print(results["results_low_salvage_atpm"])
 
-print("\n=== ATP Δ under HIGH salvage ===")
-print(results_high_salvage_atpdelta)
+    print("\n=== ATPM under HIGH salvage ===")
+    print(results["results_high_salvage_atpm"])
 
-print("\n=== ATPM under LOW salvage ===")
-print(results_low_salvage_atpm)
 
-print("\n=== ATPM under HIGH salvage ===")
-print(results_high_salvage_atpm)
+if __name__ == "__main__":
+    main()
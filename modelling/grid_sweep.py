@@ -0,0 +1,164 @@
+"""
+grid_sweep.py
+
+Multi-dimensional, resumable grid sweeps with results streamed to disk.
+
+Any combination of the axes ΔATP, ATPM, salvage flux and glucose uptake
+is swept on one warm-started iML1515 model. Points are visited in
+itertools.product order (last axis fastest) and every result row is
+appended to a CSV as it is produced. At most 'flush_every' rows are held
+in memory; each flush is fsync'ed, so the CSV itself is the checkpoint.
+
+A sidecar manifest (<out>.manifest.json) records the grid. Re-running
+the same grid with the same output file resumes after the last complete
+row; running a different grid against an existing file is an error.
+"""
+
+import csv
+import json
+import os
+from itertools import islice, product
+from typing import Optional
+
+import cobra
+
+from ecoli_salvage_modes import BIOMASS_ID, set_atp_delta, set_atpm, set_salvage
+from sweep_engine import ATP_DELTA_TERMS, BiomassATPCost, solve_growth
+
+
+def set_glucose(model: cobra.Model, uptake: float) -> None:
+    """Limit glucose uptake to 'uptake' (mmol/gDW/h, positive)."""
+    model.reactions.EX_glc__D_e.lower_bound = -uptake
+
+
+# Axis name -> perturbation applied for one value of that axis
+AXIS_SETTERS = {
+    "delta_ATP": set_atp_delta,
+    "ATPM": set_atpm,
+    "salvage": set_salvage,
+    "glucose": set_glucose,
+}
+
+
+def grid_size(axes: dict) -> int:
+    n = 1
+    for values in axes.values():
+        n *= len(values)
+    return n
+
+
+def _check_manifest(out_path: str, axes: dict) -> None:
+    manifest = out_path + ".manifest.json"
+    grid = {name: list(values) for name, values in axes.items()}
+    if os.path.exists(manifest):
+        with open(manifest) as f:
+            if json.load(f) != grid:
+                raise ValueError(
+                    f"{out_path} was written for a different grid; "
+                    "use a new output file or delete it first"
+                )
+    else:
+        with open(manifest, "w") as f:
+            json.dump(grid, f, indent=1)
+
+
+def _completed_rows(out_path: str) -> int:
+    """
+    Count complete data rows in an existing output file (-1 if there is
+    no header yet), truncating a partially written last line left by an
+    interrupted run. Reads the file in blocks, not all at once.
+    """
+    if not os.path.exists(out_path):
+        return -1
+    lines, pos, end = 0, 0, 0
+    with open(out_path, "rb+") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+            last = block.rfind(b"\n")
+            if last >= 0:
+                end = pos + last + 1
+            pos += len(block)
+        if end < pos:
+            f.truncate(end)
+    return lines - 1
+
+
+def run_grid(
+    model: cobra.Model,
+    axes: dict,
+    out_path: str,
+    flush_every: int = 1000,
+    limit: Optional[int] = None,
+) -> int:
+    """
+    Sweep the full product of 'axes' ({axis name: values}) and append one
+    row per point to 'out_path'. Resumes an interrupted run of the same
+    grid. 'limit' caps the number of points solved in this call.
+
+    Returns the number of completed points in the output file.
+    """
+    unknown = set(axes) - set(AXIS_SETTERS)
+    if unknown:
+        raise ValueError(f"Unknown axes: {sorted(unknown)}")
+    _check_manifest(out_path, axes)
+
+    names = list(axes)
+    setters = [AXIS_SETTERS[name] for name in names]
+    if "delta_ATP" in axes:
+        # Write ΔATP straight into the LP instead of via add_metabolites
+        setters[names.index("delta_ATP")] = BiomassATPCost(
+            model, BIOMASS_ID, ATP_DELTA_TERMS
+        )
+    done = _completed_rows(out_path)
+
+    with open(out_path, "a", newline="") as f:
+        writer = csv.writer(f)
+        if done < 0:
+            writer.writerow(["index"] + names + ["growth", "status"])
+            done = 0
+
+        points = islice(enumerate(product(*axes.values())), done, None)
+        if limit is not None:
+            points = islice(points, limit)
+
+        buffer = []
+        for index, values in points:
+            with model:
+                for setter, value in zip(setters, values):
+                    setter(model, value)
+                status, growth = solve_growth(model)
+            buffer.append([index, *values, growth, status])
+            if len(buffer) >= flush_every:
+                done += _flush(f, writer, buffer)
+        done += _flush(f, writer, buffer)
+
+    return done
+
+
+def _flush(f, writer, buffer: list) -> int:
+    n = len(buffer)
+    writer.writerows(buffer)
+    buffer.clear()
+    f.flush()
+    os.fsync(f.fileno())
+    return n
+
+
+def main():
+    from ecoli_salvage_modes import (
+        ATP_DELTA_VALUES, ATPM_VALUES, HIGH_SALVAGE, LOW_SALVAGE, load_ecoli_model,
+    )
+
+    model_ec = load_ecoli_model("iML1515.xml")
+    axes = {
+        "salvage": [LOW_SALVAGE, HIGH_SALVAGE],
+        "glucose": [5, 10, 15, 20],
+        "ATPM": ATPM_VALUES,
+        "delta_ATP": ATP_DELTA_VALUES,
+    }
+    n = run_grid(model_ec, axes, "ecoli_grid_sweep.csv")
+    print(f"{n} of {grid_size(axes)} grid points written to ecoli_grid_sweep.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+knockout_scan.py
+
+Single (and optionally pairwise) knockouts of the ATP gene set under ATP
+stress.
+
+The genes come from atp_genes.txt (b-numbers, written by
+classify_atp_genes.py). For each knockout the reactions it disables are
+found by evaluating every gene_reaction_rule with the knocked-out genes,
+so isozymes and complexes are handled by the GPR logic rather than by
+gene lists. Knockouts that disable no reaction are skipped, and
+knockouts that disable exactly the same reactions share one solve.
+
+Every distinct set of disabled reactions is then solved at every ΔATP /
+ATPM level. A task is one level plus a chunk of reaction sets; workers
+from parallel_sweep keep one warm model each, apply the level once and
+knock out each reaction set in turn inside ``with model:``.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import combinations
+from typing import Iterable, Optional
+
+import cobra
+import pandas as pd
+
+from parallel_sweep import (
+    MODEL_FILES, SALVAGE_FLUX, init_worker, make_perturbation, worker_model,
+)
+from sweep_engine import run_sweep
+
+
+def read_gene_list(path: str = "atp_genes.txt") -> list:
+    """Gene IDs from a one-per-line text file, in file order."""
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def disabled_reactions(model: cobra.Model, knockouts: Iterable[str]) -> frozenset:
+    """IDs of the reactions whose GPR is false once 'knockouts' are deleted."""
+    knockouts = set(knockouts)
+    candidates = set()
+    for gene_id in knockouts:
+        candidates.update(model.genes.get_by_id(gene_id).reactions)
+    return frozenset(
+        rxn.id for rxn in candidates if not rxn.gpr.eval(knockouts)
+    )
+
+
+def knockout_groups(
+    model: cobra.Model, genes: Iterable[str], pairwise: bool = False
+) -> tuple:
+    """
+    Group knockouts by the reactions they disable.
+
+    Returns (groups, skipped, missing): 'groups' maps each distinct
+    frozenset of disabled reactions to the knockouts (tuples of gene IDs)
+    producing it, in discovery order; 'skipped' lists knockouts that
+    disable nothing; 'missing' the genes not in the model, which are
+    ignored.
+    """
+    genes = list(genes)
+    present = [g for g in genes if g in model.genes]
+    missing = sorted(set(genes) - set(present))
+
+    knockouts = [(g,) for g in present]
+    if pairwise:
+        knockouts += list(combinations(present, 2))
+
+    groups, skipped = {}, []
+    for ko in knockouts:
+        rxns = disabled_reactions(model, ko)
+        if rxns:
+            groups.setdefault(rxns, []).append(ko)
+        else:
+            skipped.append(ko)
+    return groups, skipped, missing
+
+
+def _knock_out(model: cobra.Model, reaction_ids: tuple) -> None:
+    for rid in reaction_ids:
+        model.reactions.get_by_id(rid).bounds = (0, 0)
+
+
+def _run_task(task: tuple, salvage: Optional[str] = None) -> list:
+    from ecoli_salvage_modes import set_salvage
+
+    model_key, kind, value, chunk = task
+    model, orig = worker_model(model_key)
+    perturb = make_perturbation(model_key, kind, model, orig)
+
+    def setup(m):
+        if salvage is not None:
+            set_salvage(m, SALVAGE_FLUX[salvage])
+        perturb(m, value)
+
+    sets = dict(chunk)
+    rows = run_sweep(
+        model, list(sets), lambda m, i: _knock_out(m, sets[i]),
+        setup=setup, key="group",
+    )
+    return [{"perturbation": kind, "value": value, **row} for row in rows]
+
+
+def run_knockout_scan(
+    genes: Iterable[str],
+    levels: dict,
+    model_key: str = "iML1515",
+    pairwise: bool = False,
+    salvage: Optional[str] = None,
+    processes: Optional[int] = None,
+    chunksize: int = 32,
+    model_files: Optional[dict] = None,
+) -> pd.DataFrame:
+    """
+    Solve every knockout of 'genes' at every {perturbation: values} level.
+
+    Returns one row per (level, knockout) with the growth, the wild-type
+    growth at that level and their ratio. The knockouts that change no
+    reaction and the genes missing from the model are left out of the
+    rows and listed in df.attrs["skipped"] and df.attrs["missing"]. With
+    processes=1 everything runs in the calling process.
+    """
+    files = dict(MODEL_FILES, **(model_files or {}))
+    init_worker(files)
+    model, _ = worker_model(model_key)
+    groups, skipped, missing = knockout_groups(model, genes, pairwise)
+
+    # Group 0 is the wild type (nothing knocked out)
+    reaction_sets = [()] + [tuple(sorted(rxns)) for rxns in groups]
+    indexed = list(enumerate(reaction_sets))
+    tasks = [
+        (model_key, kind, value, indexed[i:i + chunksize])
+        for kind, values in levels.items()
+        for value in values
+        for i in range(0, len(indexed), chunksize)
+    ]
+    run_task = partial(_run_task, salvage=salvage)
+
+    if processes == 1:
+        results = list(map(run_task, tasks))
+    else:
+        processes = processes or os.cpu_count()
+        with ProcessPoolExecutor(
+            max_workers=min(processes, len(tasks)) or 1,
+            initializer=init_worker,
+            initargs=(files, (model_key,)),
+        ) as pool:
+            results = list(pool.map(run_task, tasks))
+
+    solved = pd.DataFrame([row for rows in results for row in rows])
+    wild_type = solved[solved["group"] == 0].set_index(["perturbation", "value"])["growth"]
+
+    knockouts = pd.DataFrame(
+        [
+            {"group": i, "genes": ";".join(ko), "n_genes": len(ko),
+             "n_reactions": len(reaction_sets[i]),
+             "reactions": ";".join(reaction_sets[i])}
+            for i, kos in enumerate(groups.values(), start=1)
+            for ko in kos
+        ]
+    )
+    df = knockouts.merge(solved, on="group").drop(columns="group")
+    df["wt_growth"] = wild_type.reindex(
+        pd.MultiIndex.from_frame(df[["perturbation", "value"]])
+    ).to_numpy()
+    df["growth_ratio"] = df["growth"] / df["wt_growth"].where(df["wt_growth"] > 0)
+    df.insert(0, "model", model_key)
+    df.insert(1, "salvage", salvage)
+    df = df.sort_values(["perturbation", "value", "n_genes"], kind="stable",
+                        ignore_index=True)
+    df.attrs.update(skipped=skipped, missing=missing)
+    return df
+
+
+def main():
+    import sys
+
+    from ecoli_salvage_modes import ATP_DELTA_VALUES, ATPM_VALUES
+
+    pairwise = "--pairwise" in sys.argv
+    df = run_knockout_scan(
+        read_gene_list("atp_genes.txt"),
+        {"atp_delta": ATP_DELTA_VALUES, "atpm": ATPM_VALUES},
+        pairwise=pairwise,
+    )
+    missing, skipped = df.attrs["missing"], df.attrs["skipped"]
+    if missing:
+        print(f"{len(missing)} genes not in the model: {', '.join(missing[:10])}"
+              + (" ..." if len(missing) > 10 else ""))
+    print(f"{df['genes'].nunique()} knockouts -> {df['reactions'].nunique()} "
+          f"distinct reaction sets; {len(skipped)} knockouts change no reaction")
+    out = "atp_gene_knockouts_pairwise.csv" if pairwise else "atp_gene_knockouts.csv"
+    df.to_csv(out, index=False)
+    print(df)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+model_cache.py
+
+Cache of parsed (and optionally pre-configured) cobra models.
+
+Parsing iML1515.xml takes seconds, and every modelling script used to do
+it at startup. Here the SBML file is parsed once and the resulting model
+is pickled into a cache directory, keyed by the SHA-256 of the file
+contents. When a preset (e.g. the minimal-medium setup) is given, it is
+applied before pickling and its source code, together with the values it
+reads from outside the model ('params'), is part of the key, so the
+cached model comes back fully configured.
+
+Editing the XML, the preset or its parameters changes the key, so stale
+entries are never loaded; they are removed the next time the model is
+cached.
+
+The cache directory defaults to ./.model_cache and can be overridden with
+the ATP_MODEL_CACHE environment variable.
+"""
+
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+from typing import Callable, Optional
+
+import cobra
+
+CACHE_DIR = os.environ.get("ATP_MODEL_CACHE", ".model_cache")
+
+
+def file_digest(path: str) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _preset_tag(preset: Optional[Callable], params: tuple = ()) -> str:
+    if preset is None:
+        return "raw"
+    try:
+        source = inspect.getsource(preset)
+    except (OSError, TypeError):
+        source = f"{preset.__module__}.{preset.__qualname__}"
+    key = f"{source}\n{params!r}"
+    return f"{preset.__name__}-{hashlib.sha256(key.encode()).hexdigest()[:12]}"
+
+
+def _cache_name(stem: str, digest: str, tag: str) -> str:
+    return f"{stem}-{digest[:16]}-{tag}.pkl"
+
+
+def _drop_stale(cache_dir: str, stem: str, digest: str, tag: str) -> None:
+    """Remove entries for the same model and preset but other file contents."""
+    keep = _cache_name(stem, digest, tag)
+    prefix, suffix = f"{stem}-", f"-{tag}.pkl"
+    for other in os.listdir(cache_dir):
+        if other == keep or not (other.startswith(prefix) and other.endswith(suffix)):
+            continue
+        if len(other) - len(prefix) - len(suffix) != 16:
+            continue  # a different model whose name shares the prefix
+        try:
+            os.remove(os.path.join(cache_dir, other))
+        except OSError:
+            pass
+
+
+def load_cached_model(
+    path: str,
+    preset: Optional[Callable[[cobra.Model], None]] = None,
+    cache_dir: str = CACHE_DIR,
+    params: tuple = (),
+) -> cobra.Model:
+    """
+    Load an SBML model through the cache.
+
+    'preset' is called on the freshly parsed model before it is cached.
+    Any module-level values it reads (media, objective IDs, ...) must be
+    passed in 'params' so that changing them invalidates the entry.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    digest, tag = file_digest(path), _preset_tag(preset, params)
+    cache_path = os.path.join(cache_dir, _cache_name(stem, digest, tag))
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            pass  # unreadable entry: rebuild it below
+
+    model = cobra.io.read_sbml_model(path)
+    if preset is not None:
+        preset(model)
+
+    # Write to a temporary file first so concurrent jobs never read a
+    # half-written entry.
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    _drop_stale(cache_dir, stem, digest, tag)
+    return model
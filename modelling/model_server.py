@@ -0,0 +1,176 @@
+"""
+model_server.py
+
+Long-lived local HTTP server for interactive ATP stress queries.
+
+The configured models (iML1515 with the minimal medium, iLG240) are
+loaded once at startup and kept in memory, together with their ΔATP
+coefficient writers, so a query costs one warm-started LP solve rather
+than an SBML load plus medium setup. Every query is applied inside a
+``with model:`` block and reverted afterwards. Requests are handled one
+at a time, since each model is a single mutable object.
+
+Endpoints (JSON in, JSON out):
+
+  GET  /models    loaded models and the available salvage presets
+  POST /optimize  {"model": "iML1515", "salvage": "LOW", "atpm": 50,
+                   "delta_atp": 100, "glucose": 10}
+                  -> {"growth": ..., "status": ..., "elapsed_ms": ...}
+                  Every field except "model" is optional.
+  POST /sweep     {"model": "iLG240", "perturbation": "atpm",
+                   "values": [0, 10, 20], "salvage": null}
+                  -> {"rows": [{"value", "growth", "status"}, ...]}
+
+Run with:  python model_server.py [port]   (binds to 127.0.0.1 only)
+"""
+
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Optional
+from urllib.request import Request, urlopen
+
+from ecoli_salvage_modes import set_salvage
+from grid_sweep import set_glucose
+from parallel_sweep import SALVAGE_FLUX, find_atpm, load_model, make_perturbation
+from sweep_engine import run_sweep, solve_growth
+
+DEFAULT_PORT = 8765
+
+
+class ModelPool:
+    """Loaded models plus their ATPM and ΔATP perturbations, by key."""
+
+    def __init__(self, model_keys=("iML1515", "iLG240"), model_files=None):
+        self.models = {}
+        for key in model_keys:
+            model, orig = load_model(key, (model_files or {}).get(key))
+            model.slim_optimize()  # leave a basis for the first query
+            self.models[key] = {
+                "model": model,
+                "atpm_id": find_atpm(model),
+                "atpm": make_perturbation(key, "atpm", model, orig),
+                "atp_delta": make_perturbation(key, "atp_delta", model, orig),
+            }
+
+    def _entry(self, key: str) -> dict:
+        if key not in self.models:
+            raise ValueError(f"Unknown model {key!r}; loaded: {sorted(self.models)}")
+        return self.models[key]
+
+    def _setup(self, salvage):
+        if salvage is None:
+            return None
+        flux = SALVAGE_FLUX[salvage] if isinstance(salvage, str) else float(salvage)
+        return lambda m: set_salvage(m, flux)
+
+    def optimize(self, query: dict) -> dict:
+        entry = self._entry(query.get("model", "iML1515"))
+        model = entry["model"]
+        setup = self._setup(query.get("salvage"))
+        with model:
+            if setup is not None:
+                setup(model)
+            if query.get("glucose") is not None:
+                set_glucose(model, float(query["glucose"]))
+            if query.get("atpm") is not None:
+                entry["atpm"](model, float(query["atpm"]))
+            if query.get("delta_atp"):
+                entry["atp_delta"](model, float(query["delta_atp"]))
+            status, growth = solve_growth(model)
+        return {"growth": growth, "status": status}
+
+    def sweep(self, query: dict) -> dict:
+        entry = self._entry(query.get("model", "iML1515"))
+        kind = query.get("perturbation", "atp_delta")
+        if kind not in ("atpm", "atp_delta"):
+            raise ValueError(f"Unknown perturbation {kind!r}")
+        rows = run_sweep(
+            entry["model"], [float(v) for v in query["values"]], entry[kind],
+            setup=self._setup(query.get("salvage")),
+        )
+        return {"rows": rows}
+
+    def describe(self) -> dict:
+        return {
+            "models": {
+                key: {"reactions": len(e["model"].reactions), "atpm": e["atpm_id"]}
+                for key, e in self.models.items()
+            },
+            "salvage": SALVAGE_FLUX,
+        }
+
+
+def make_handler(pool: ModelPool):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, body: dict) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/models":
+                self._reply(200, pool.describe())
+            else:
+                self._reply(404, {"error": f"Unknown path {self.path}"})
+
+        def do_POST(self):
+            routes = {"/optimize": pool.optimize, "/sweep": pool.sweep}
+            if self.path not in routes:
+                self._reply(404, {"error": f"Unknown path {self.path}"})
+                return
+            start = time.perf_counter()
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                query = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(query, dict):
+                    raise ValueError("Request body must be a JSON object")
+                body = routes[self.path](query)
+            except (ValueError, KeyError, TypeError) as e:
+                self._reply(400, {"error": str(e)})
+                return
+            except Exception as e:  # model or solver failure: still answer
+                self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+                return
+            body["elapsed_ms"] = 1000 * (time.perf_counter() - start)
+            self._reply(200, body)
+
+        def log_message(self, fmt, *args):
+            pass  # keep the console quiet; timings are in the responses
+
+    return Handler
+
+
+def serve(port: int = DEFAULT_PORT, pool: Optional[ModelPool] = None) -> HTTPServer:
+    """Create the server on 127.0.0.1:'port' (call serve_forever on it)."""
+    pool = pool or ModelPool()
+    return HTTPServer(("127.0.0.1", port), make_handler(pool))
+
+
+def query(path: str, payload: Optional[dict] = None, port: int = DEFAULT_PORT) -> dict:
+    """Small client: GET when 'payload' is None, POST it as JSON otherwise."""
+    url = f"http://127.0.0.1:{port}{path}"
+    data = None if payload is None else json.dumps(payload).encode()
+    req = Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urlopen(req) as resp:
+        return json.loads(resp.read())
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    server = serve(port)
+    print(f"Serving ATP stress queries on http://127.0.0.1:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+parallel_sweep.py
+
+Process-pool executor for the ATP stress sweeps.
+
+A sweep point is a tuple (model, salvage, perturbation, value), e.g.
+("iML1515", "LOW", "atp_delta", 50). Points are grouped into chunks of
+consecutive values that share model, salvage mode and perturbation; each
+chunk is solved by one worker with the warm-started sweep engine.
+
+Every worker loads each model once (on first use) and keeps it for the
+rest of the run, so the cost of parsing SBML is paid once per process
+instead of once per point. Results come back in the order of the input
+points.
+
+With diagnostics=True every point also gets shadow prices, reduced costs
+and ATP-reaction FVA ranges (see sweep_diagnostics).
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import product
+from typing import Iterable, Optional
+
+import cobra
+import pandas as pd
+
+from sweep_engine import ATP_DELTA_TERMS, HYDROLYSIS, BiomassATPCost, run_sweep
+
+MODEL_FILES = {"iML1515": "iML1515.xml", "iLG240": "iLG240.xml"}
+
+SALVAGE_FLUX = {"LOW": 1, "HIGH": 1000}
+
+# Per-process model cache: model key -> (model, ATP coefficient baseline)
+_WORKER_MODELS = {}
+_WORKER_FILES = dict(MODEL_FILES)
+
+
+def load_model(model_key: str, path: Optional[str] = None) -> tuple:
+    """
+    Load a configured model by key ("iML1515" with the minimal medium,
+    or "iLG240"). Returns (model, original biomass ATP coefficients),
+    the latter only for iLG240.
+    """
+    path = path or _WORKER_FILES[model_key]
+    if model_key == "iML1515":
+        from ecoli_salvage_modes import load_ecoli_model
+        return load_ecoli_model(path), None
+    if model_key == "iLG240":
+        from biomass_ATP_sweep import get_original_atp_coeffs, load_buchnera_model
+        model = load_buchnera_model(path)
+        biomass = model.reactions.get_by_id("BIOMASS")
+        return model, get_original_atp_coeffs(biomass, model)
+    raise ValueError(f"Unknown model key: {model_key}")
+
+
+def worker_model(model_key: str) -> tuple:
+    """
+    The calling process's loaded (model, orig) for 'model_key', loaded
+    from the files set by init_worker on first use and kept afterwards.
+    """
+    if model_key not in _WORKER_MODELS:
+        _WORKER_MODELS[model_key] = load_model(model_key)
+    return _WORKER_MODELS[model_key]
+
+
+def init_worker(model_files: dict, preload: tuple = ()) -> None:
+    """
+    Set the model files of this process (pool initializer, or called
+    directly for in-process runs) and load the 'preload' model keys.
+    """
+    _WORKER_FILES.update(model_files)
+    for model_key in preload:
+        worker_model(model_key)
+
+
+def find_atpm(model: cobra.Model) -> str:
+    for r in model.reactions:
+        if r.id.lower() == "atpm":
+            return r.id
+    raise ValueError("ATPM reaction not found in the model!")
+
+
+def make_perturbation(model_key: str, kind: str, model: cobra.Model, orig):
+    """
+    Return the perturbation for 'kind' ("atpm" or "atp_delta") on a model
+    returned by load_model. Create it after any structural change.
+    """
+    if kind == "atpm":
+        atpm_id = find_atpm(model)
+
+        def set_atpm(m, value):
+            m.reactions.get_by_id(atpm_id).lower_bound = value
+
+        return set_atpm
+    if kind == "atp_delta":
+        if model_key == "iLG240":
+            return BiomassATPCost(model, "BIOMASS", HYDROLYSIS, orig=orig)
+        from ecoli_salvage_modes import BIOMASS_ID
+        return BiomassATPCost(model, BIOMASS_ID, ATP_DELTA_TERMS)
+    raise ValueError(f"Unknown perturbation: {kind}")
+
+
+def _collector(model_key: str, model: cobra.Model, fraction_of_optimum: float):
+    from sweep_diagnostics import make_collector
+
+    if model_key == "iLG240":
+        biomass_id = "BIOMASS"
+    else:
+        from ecoli_salvage_modes import BIOMASS_ID as biomass_id
+    return make_collector(model, biomass_id, find_atpm(model), fraction_of_optimum)
+
+
+def _run_chunk(
+    chunk: list, diagnostics: bool = False, fraction_of_optimum: float = 1.0
+) -> list:
+    from ecoli_salvage_modes import set_salvage
+
+    model_key, salvage, kind, _ = chunk[0]
+    model, orig = worker_model(model_key)
+    setup = None
+    if salvage is not None:
+        flux = SALVAGE_FLUX[salvage]
+        setup = lambda m: set_salvage(m, flux)
+    collect = None
+    if diagnostics:
+        collect = _collector(model_key, model, fraction_of_optimum)
+
+    rows = run_sweep(
+        model, [p[3] for p in chunk], make_perturbation(model_key, kind, model, orig),
+        setup=setup, collect=collect,
+    )
+    return [
+        {"model": model_key, "salvage": salvage, "perturbation": kind, **row}
+        for row in rows
+    ]
+
+
+def _chunks(points: list, chunksize: int):
+    """Split points into runs of at most 'chunksize' sharing one sweep."""
+    chunk = []
+    for p in points:
+        if chunk and (len(chunk) == chunksize or tuple(p[:3]) != tuple(chunk[0][:3])):
+            yield chunk
+            chunk = []
+        chunk.append(tuple(p))
+    if chunk:
+        yield chunk
+
+
+def sweep_points(
+    models: Iterable[str],
+    salvage_modes: Iterable[Optional[str]],
+    grids: dict,
+) -> list:
+    """
+    Build the (model, salvage, perturbation, value) points for every
+    combination of model, salvage mode and {perturbation: values} grid.
+    """
+    return [
+        (model_key, salvage, kind, value)
+        for model_key, salvage, (kind, values) in product(models, salvage_modes, grids.items())
+        for value in values
+    ]
+
+
+def run_parallel_sweep(
+    points: list,
+    processes: Optional[int] = None,
+    chunksize: int = 4,
+    model_files: Optional[dict] = None,
+    diagnostics: bool = False,
+    fraction_of_optimum: float = 1.0,
+) -> pd.DataFrame:
+    """
+    Solve all sweep points across a process pool.
+
+    Returns a DataFrame with one row per point, in input order. With
+    processes=1 everything runs in the calling process. With
+    diagnostics=True the rows also carry the sweep_diagnostics columns
+    (split them with sweep_diagnostics.split_fva).
+    """
+    files = dict(MODEL_FILES, **(model_files or {}))
+    chunks = list(_chunks(points, chunksize))
+    preload = tuple(sorted({p[0] for p in points}))
+    run_chunk = partial(
+        _run_chunk, diagnostics=diagnostics, fraction_of_optimum=fraction_of_optimum
+    )
+
+    if processes == 1:
+        init_worker(files, ())
+        results = map(run_chunk, chunks)
+        return pd.DataFrame([row for rows in results for row in rows])
+
+    processes = processes or os.cpu_count()
+    with ProcessPoolExecutor(
+        max_workers=min(processes, len(chunks)) or 1,
+        initializer=init_worker,
+        initargs=(files, preload),
+    ) as pool:
+        results = pool.map(run_chunk, chunks)
+        return pd.DataFrame([row for rows in results for row in rows])
+
+
+def main():
+    from ecoli_salvage_modes import ATP_DELTA_VALUES, ATPM_VALUES
+
+    points = sweep_points(
+        ["iML1515"],
+        ["LOW", "HIGH"],
+        {"atp_delta": ATP_DELTA_VALUES, "atpm": ATPM_VALUES},
+    )
+    df = run_parallel_sweep(points)
+    df.to_csv("ecoli_salvage_modes_sweep.csv", index=False)
+    print(df)
+
+
+if __name__ == "__main__":
+    main()
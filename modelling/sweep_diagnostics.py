@@ -0,0 +1,246 @@
+"""
+sweep_diagnostics.py
+
+Shadow prices, reduced costs and ATP flux variability at every sweep point.
+
+After each ΔATP/ATPM solve, collect_diagnostics records
+ - the shadow prices of atp_c and adp_c,
+ - the reduced costs of ATPM and the biomass reaction,
+ - the FVA range of every reaction that produces or consumes atp_c.
+
+Running cobra's flux_variability_analysis after each optimize() would set
+up (and, with processes > 1, pickle) the whole model once per point. Here
+FVA runs on the live, already solved model: the growth optimum is fixed
+as a constraint once, and each sub-problem only swaps the objective
+coefficients of one reaction, so every min/max LP starts from the basis
+of the previous one. Parallelism comes from spreading sweep points over
+parallel_sweep's worker processes, each with its own warm model.
+"""
+
+from typing import Optional
+
+import cobra
+import pandas as pd
+from cobra.util.solver import fix_objective_as_constraint
+from optlang.symbolics import Zero
+
+from sweep_engine import glpk_index
+
+
+def atp_reactions(model: cobra.Model, met_id: str = "atp_c") -> dict:
+    """
+    Map each reaction involving 'met_id' to its role: 'consumer' or
+    'producer' by the sign of its coefficient in the forward direction,
+    or 'reversible' if its bounds allow both directions.
+    """
+    roles = {}
+    for rxn in model.metabolites.get_by_id(met_id).reactions:
+        coeff = rxn.metabolites[model.metabolites.get_by_id(met_id)]
+        if rxn.lower_bound == rxn.upper_bound == 0:
+            roles[rxn.id] = "blocked"
+        elif rxn.lower_bound < 0 < rxn.upper_bound:
+            roles[rxn.id] = "reversible"
+        elif (coeff < 0) == (rxn.upper_bound > 0):
+            roles[rxn.id] = "consumer"
+        else:
+            roles[rxn.id] = "producer"
+    return dict(sorted(roles.items()))
+
+
+def _flux_reader(model: cobra.Model, rxns: list):
+    """
+    Return a function reading the current net flux of 'rxns' from the
+    solver. Under GLPK the LP columns are read by cached index, which is
+    far cheaper than optlang's primal_values for a few hundred reactions.
+    """
+    pairs = [(r.forward_variable, r.reverse_variable) for r in rxns]
+    if model.solver.interface.__name__.startswith("optlang.glpk"):
+        import swiglpk as glp
+
+        lp = model.solver.problem
+        cols = [(glpk_index(lp, f), glpk_index(lp, r)) for f, r in pairs]
+        return lambda: [
+            glp.glp_get_col_prim(lp, f) - glp.glp_get_col_prim(lp, r) for f, r in cols
+        ]
+
+    names = [(f.name, r.name) for f, r in pairs]
+
+    def read():
+        primal = model.solver.primal_values
+        return [primal[f] - primal[r] for f, r in names]
+
+    return read
+
+
+def _objective_solver(model: cobra.Model):
+    """
+    Return a function that re-solves the LP and returns the objective
+    value (nan if not optimal). Under GLPK it calls glp_simplex directly:
+    optlang re-scales the whole problem before every solve, which costs
+    more than the warm-started simplex itself for an FVA sub-problem.
+    The simplex parameters are built from the solver's public
+    configuration; anything short of optimal, or a GLPK setup that
+    cannot be used, goes through optlang's optimize().
+    """
+    def via_optlang():
+        model.solver.optimize()
+        if model.solver.status != "optimal":
+            return float("nan")
+        return model.solver.objective.value
+
+    if not model.solver.interface.__name__.startswith("optlang.glpk"):
+        return via_optlang
+    try:
+        import swiglpk as glp
+    except ImportError:
+        return via_optlang
+
+    lp, config = model.solver.problem, model.solver.configuration
+    params = glp.glp_smcp()
+    glp.glp_init_smcp(params)
+    params.msg_lev = glp.GLP_MSG_OFF
+    params.presolve = glp.GLP_OFF  # keep the previous basis
+    params.tol_bnd = config.tolerances.feasibility
+    if config.timeout is not None:
+        params.tm_lim = int(config.timeout * 1000)
+
+    def via_glpk():
+        if glp.glp_simplex(lp, params) == 0 and glp.glp_get_status(lp) == glp.GLP_OPT:
+            return glp.glp_get_obj_val(lp)
+        return via_optlang()
+
+    return via_glpk
+
+
+def batched_fva(
+    model: cobra.Model,
+    reaction_ids: list,
+    fraction_of_optimum: float = 1.0,
+    tol: float = 1e-9,
+) -> list:
+    """
+    Flux ranges of 'reaction_ids' on an already optimised model, with the
+    objective held at 'fraction_of_optimum' of its current optimum.
+
+    All minimisations run first, then all maximisations, so consecutive
+    sub-problems differ only in one pair of objective coefficients. After
+    every solve (starting with the model's own optimum) each unresolved
+    reaction sitting at its lower (upper) bound has its minimum (maximum)
+    settled without an LP of its own.
+    Returns a list of {"reaction", "minimum", "maximum"} dicts.
+    """
+    rxns = [model.reactions.get_by_id(rid) for rid in reaction_ids]
+    ranges = {rid: {"reaction": rid} for rid in reaction_ids}
+    pending = {"minimum": dict(zip(reaction_ids, rxns)),
+               "maximum": dict(zip(reaction_ids, rxns))}
+
+    fluxes = _flux_reader(model, rxns)
+    bounds = {rid: rxn.bounds for rid, rxn in zip(reaction_ids, rxns)}
+
+    def settle_at_bounds():
+        flux = dict(zip(reaction_ids, fluxes()))
+        for rid in list(pending["minimum"]):
+            if flux[rid] <= bounds[rid][0] + tol:
+                ranges[rid]["minimum"] = bounds[rid][0]
+                del pending["minimum"][rid]
+        for rid in list(pending["maximum"]):
+            if flux[rid] >= bounds[rid][1] - tol:
+                ranges[rid]["maximum"] = bounds[rid][1]
+                del pending["maximum"][rid]
+
+    with model:
+        settle_at_bounds()  # the current optimum is itself FVA-feasible
+        fix_objective_as_constraint(model, fraction=fraction_of_optimum)
+        model.objective = model.problem.Objective(Zero, direction="max", sloppy=True)
+        objective = model.solver.objective
+        solve = _objective_solver(model)
+        for direction, column in (("min", "minimum"), ("max", "maximum")):
+            objective.direction = direction
+            while pending[column]:
+                rid, rxn = pending[column].popitem()
+                fwd, rev = rxn.forward_variable, rxn.reverse_variable
+                objective.set_linear_coefficients({fwd: 1, rev: -1})
+                value = ranges[rid][column] = solve()
+                objective.set_linear_coefficients({fwd: 0, rev: 0})
+                if value == value:  # optimal (not nan)
+                    settle_at_bounds()
+    return list(ranges.values())
+
+
+def collect_diagnostics(
+    model: cobra.Model,
+    roles: dict,
+    biomass_id: str,
+    atpm_id: Optional[str] = "ATPM",
+    fraction_of_optimum: float = 1.0,
+) -> dict:
+    """
+    Diagnostics for the current optimum of 'model' (call right after a
+    successful solve). The FVA ranges are returned under the "fva" key
+    as a list of dicts; see split_fva.
+    """
+    constraints = model.constraints
+    row = {
+        "shadow_price_atp_c": constraints["atp_c"].dual,
+        "shadow_price_adp_c": constraints["adp_c"].dual,
+        "reduced_cost_biomass": model.reactions.get_by_id(biomass_id).reduced_cost,
+    }
+    if atpm_id is not None and atpm_id in model.reactions:
+        row["reduced_cost_ATPM"] = model.reactions.get_by_id(atpm_id).reduced_cost
+
+    fva = batched_fva(model, list(roles), fraction_of_optimum)
+    for r in fva:
+        r["role"] = roles[r["reaction"]]
+    row["fva"] = fva
+    return row
+
+
+def make_collector(
+    model: cobra.Model,
+    biomass_id: str,
+    atpm_id: Optional[str] = "ATPM",
+    fraction_of_optimum: float = 1.0,
+):
+    """Return a run_sweep 'collect' callback for 'model'."""
+    roles = atp_reactions(model)
+    return lambda m: collect_diagnostics(
+        m, roles, biomass_id, atpm_id, fraction_of_optimum
+    )
+
+
+def split_fva(df: pd.DataFrame) -> tuple:
+    """
+    Split sweep results with an "fva" column into (summary, fva) frames;
+    the FVA frame is long-form, one row per sweep point and reaction.
+    """
+    id_cols = [
+        c for c in df.columns
+        if c not in ("fva", "growth", "status")
+        and not c.startswith(("shadow_price_", "reduced_cost_"))
+    ]
+    fva = df[id_cols + ["fva"]].explode("fva").dropna(subset=["fva"])
+    fva = pd.concat(
+        [fva[id_cols].reset_index(drop=True),
+         pd.DataFrame(fva["fva"].tolist())],
+        axis=1,
+    )
+    return df.drop(columns="fva"), fva
+
+
+def main():
+    from ecoli_salvage_modes import ATP_DELTA_VALUES, ATPM_VALUES
+    from parallel_sweep import run_parallel_sweep, sweep_points
+
+    points = sweep_points(
+        ["iML1515"],
+        ["LOW", "HIGH"],
+        {"atp_delta": ATP_DELTA_VALUES, "atpm": ATPM_VALUES},
+    )
+    summary, fva = split_fva(run_parallel_sweep(points, diagnostics=True))
+    summary.to_csv("ecoli_salvage_modes_diagnostics.csv", index=False)
+    fva.to_csv("ecoli_salvage_modes_atp_fva.csv", index=False)
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+sweep_engine.py
+
+Warm-started, in-place sweep engine for the ATP stress analyses.
+
+The original sweeps copied the whole model for every ΔATP/ATPM value,
+which also rebuilt the LP from scratch. Here a single model (and its
+solver instance) is kept alive for the whole sweep. Each perturbation is
+applied inside a ``with model:`` block, so cobra records the bound and
+stoichiometry changes and reverts them when the block exits. The LP is
+only edited, never rebuilt, so every point is re-solved starting from the
+basis of the previous one.
+
+BiomassATPCost goes one step further for ΔATP sweeps: it writes the
+biomass ATP-hydrolysis coefficients straight into the solver's constraint
+matrix, bypassing cobra's model-change machinery.
+"""
+
+from typing import Callable, Iterable, Optional
+
+import cobra
+from cobra.util.context import get_context
+
+# A perturbation modifies the model in place for one sweep value.
+Perturbation = Callable[[cobra.Model, float], None]
+
+# Biomass terms added per unit ΔATP. ATP_DELTA_TERMS matches
+# ecoli_salvage_modes.set_atp_delta, which leaves water out; the Buchnera
+# and atp_biomass_load_ecoli sweeps use the full HYDROLYSIS.
+HYDROLYSIS = {"atp_c": -1, "h2o_c": -1, "adp_c": 1, "pi_c": 1, "h_c": 1}
+ATP_DELTA_TERMS = {"atp_c": -1, "adp_c": 1, "pi_c": 1, "h_c": 1}
+
+
+def glpk_index(lp, item, kind: str = "col") -> int:
+    """
+    GLPK row or column number of an optlang Variable (kind="col") or
+    Constraint (kind="row"), looked up by name through swiglpk's public
+    name index rather than optlang's private bookkeeping.
+    """
+    import swiglpk as glp
+
+    glp.glp_create_index(lp)  # no-op when optlang already built it
+    find = glp.glp_find_col if kind == "col" else glp.glp_find_row
+    index = find(lp, str(item.name))
+    if index == 0:
+        raise KeyError(f"{item.name!r} is not a GLPK {kind} of this problem")
+    return index
+
+
+def solve_growth(model: cobra.Model) -> tuple:
+    """
+    Re-optimise the model in place and return (status, growth).
+
+    Growth is reported as 0.0 whenever the LP is not optimal, matching the
+    convention used by the Buchnera sweeps.
+    """
+    growth = model.slim_optimize(error_value=float("nan"))
+    status = model.solver.status
+    if status != "optimal":
+        return status, 0.0
+    return status, growth
+
+
+def run_sweep(
+    model: cobra.Model,
+    values: Iterable[float],
+    perturb: Perturbation,
+    setup: Optional[Callable[[cobra.Model], None]] = None,
+    key: str = "value",
+    collect: Optional[Callable[[cobra.Model], dict]] = None,
+) -> list:
+    """
+    Sweep 'values' through 'perturb' on a single, warm-started model.
+
+    'setup' (e.g. a salvage mode) is applied once for the whole sweep and
+    'perturb' once per value; both are reverted afterwards, so the model
+    is returned in exactly the state it was passed in.
+
+    Returns one dict per value: {key: value, "growth": ..., "status": ...}.
+    If given, 'collect' is called on the still-perturbed model after every
+    optimal solve and its dict is merged into that row.
+    """
+    rows = []
+    with model:
+        if setup is not None:
+            setup(model)
+        for value in values:
+            with model:
+                perturb(model, value)
+                status, growth = solve_growth(model)
+                row = {key: value, "growth": growth, "status": status}
+                if collect is not None and status == "optimal":
+                    row.update(collect(model))
+            rows.append(row)
+    return rows
+
+
+class BiomassATPCost:
+    """
+    Set biomass ATP-hydrolysis coefficients directly in the solver.
+
+    Coefficients are always set relative to the original ones, i.e.
+    coefficient = original + delta * terms[met], so changes never
+    accumulate. The originals are read from the biomass reaction and
+    checked against the solver matrix and, if given, against 'orig'
+    (e.g. from biomass_ATP_sweep.get_original_atp_coeffs).
+
+    With GLPK the whole biomass column is rewritten with one
+    glp_set_mat_col call per LP variable; other solvers go through
+    optlang's set_linear_coefficients. The cobra Reaction is not updated,
+    so the coefficients are restored when the enclosing ``with model:``
+    block exits (or on restore()). Create one instance per sweep: it
+    caches LP indices, so the model structure must not change while it
+    is in use.
+
+    An instance is itself a perturbation and can be passed to run_sweep.
+    """
+
+    def __init__(
+        self,
+        model: cobra.Model,
+        biomass_id: str,
+        terms: dict = HYDROLYSIS,
+        orig: Optional[dict] = None,
+        tol: float = 1e-9,
+    ):
+        rxn = model.reactions.get_by_id(biomass_id)
+        current = {met.id: coeff for met, coeff in rxn.metabolites.items()}
+        self.model = model
+        self.terms = dict(terms)
+        self.orig = {met_id: current.get(met_id, 0.0) for met_id in self.terms}
+
+        for met_id, coeff in self.orig.items():
+            if orig is not None and abs(orig[met_id] - coeff) > tol:
+                raise ValueError(
+                    f"{biomass_id}: {met_id} coefficient {coeff} differs from "
+                    f"the original {orig[met_id]}; reset the reaction first"
+                )
+
+        model.solver.update()
+        self._fwd, self._rev = rxn.forward_variable, rxn.reverse_variable
+        self._rows = {met_id: model.constraints[met_id] for met_id in self.terms}
+        for met_id, row in self._rows.items():
+            in_solver = row.get_linear_coefficients([self._fwd])[self._fwd]
+            if abs(in_solver - self.orig[met_id]) > tol:
+                raise ValueError(
+                    f"Solver coefficient of {met_id} in {biomass_id} ({in_solver}) "
+                    f"does not match the model ({self.orig[met_id]})"
+                )
+
+        self._columns = None
+        if model.solver.interface.__name__.startswith("optlang.glpk"):
+            self._columns = [self._glpk_column(v, sign) for v, sign in
+                             ((self._fwd, 1.0), (self._rev, -1.0))]
+
+    def _glpk_column(self, variable, sign: float) -> tuple:
+        """Read one biomass LP column and locate the ATP rows in it."""
+        import swiglpk as glp
+
+        lp = self.model.solver.problem
+        n_rows = glp.glp_get_num_rows(lp)
+        ind, val = glp.intArray(n_rows + 1), glp.doubleArray(n_rows + 1)
+        j = glpk_index(lp, variable)
+        nnz = glp.glp_get_mat_col(lp, j, ind, val)
+        position = {ind[k]: k for k in range(1, nnz + 1)}
+        slots = []
+        for met_id, row in self._rows.items():
+            i = glpk_index(lp, row, "row")
+            k = position.get(i)
+            if k is None:  # metabolite not in the column yet: append it
+                nnz += 1
+                ind[nnz], k = i, nnz
+            slots.append((k, met_id))
+        return j, ind, val, nnz, sign, slots
+
+    def _write(self, coeffs: dict) -> None:
+        if self._columns is None:
+            for met_id, row in self._rows.items():
+                c = coeffs[met_id]
+                row.set_linear_coefficients({self._fwd: c, self._rev: -c})
+            return
+        import swiglpk as glp
+
+        lp = self.model.solver.problem
+        for j, ind, val, nnz, sign, slots in self._columns:
+            for k, met_id in slots:
+                val[k] = sign * coeffs[met_id]
+            glp.glp_set_mat_col(lp, j, nnz, ind, val)
+
+    def set(self, delta: float) -> None:
+        """Apply an extra ATP cost of 'delta' per unit biomass."""
+        self._write({m: c + delta * self.terms[m] for m, c in self.orig.items()})
+        context = get_context(self.model)
+        if context is not None:
+            context(self.restore)
+
+    def restore(self) -> None:
+        """Write the original coefficients back."""
+        self._write(self.orig)
+
+    def __call__(self, model: cobra.Model, delta: float) -> None:
+        self.set(delta)
@@ -0,0 +1,204 @@
+"""
+Chunked, memory-bounded ingest of per-line mutation tables.
+
+The file is read in chunks. Within a chunk the line and gene columns are
+factorized, so the .str cleaning runs once per distinct raw value rather
+than once per row, and every cleaned line and gene gets a global integer
+code. Per line the reader keeps event counts and two bitsets over gene
+codes: genes seen, and genes whose first occurrence was flagged ATP. The
+same pair of bitsets is kept for the whole file. Memory therefore grows
+with lines x genes, not with rows.
+
+Each script's own reading quirks are kept as presets:
+ - "summary" (linewise_ATP_summary_fixed.py): first row skipped;
+   spaces removed from line names.
+ - "fixed" (linewise_enrichment_fixed.py): first row skipped; runs of
+   whitespace collapsed and "line " rewritten to "line_".
+ - "flag" (linewise_enrichment.py): first row is the header.
+
+Counts match enrichment_engine.line_counts on the fully loaded frame
+(unique genes keep the ATP flag of their first occurrence).
+"""
+
+import numpy as np
+import pandas as pd
+
+TRUE_VALUES = ["true", "t", "1"]
+
+
+def _clean_summary(lines: pd.Series) -> pd.Series:
+    return lines.str.strip().str.lower().str.replace(" ", "")
+
+
+def _clean_fixed(lines: pd.Series) -> pd.Series:
+    return (
+        lines.str.strip()
+        .str.lower()
+        .replace(r"\s+", " ", regex=True)
+        .replace("line ", "line_", regex=True)
+    )
+
+
+def _clean_flag(lines: pd.Series) -> pd.Series:
+    return lines.str.strip().str.lower()
+
+
+PRESETS = {
+    "summary": {"read": {"header": None, "skiprows": 1}, "line": _clean_summary},
+    "fixed": {"read": {"header": None, "skiprows": 1}, "line": _clean_fixed},
+    "flag": {"read": {"header": 0}, "line": _clean_flag},
+}
+
+
+class MutationIngest:
+    """Incremental per-line counts and unique-gene bitsets."""
+
+    def __init__(self, clean_line=_clean_flag, atp_genes=None):
+        self.clean_line = clean_line
+        # With 'atp_genes' (cleaned names), ATP status comes from membership
+        # instead of the is_ATP_gene column
+        self.atp_genes = None if atp_genes is None else set(atp_genes)
+        self.line_codes, self.gene_codes = {}, {}
+        self._atp_code = np.zeros(0, dtype=bool)         # per gene code
+        self.events = np.zeros(0, dtype=np.int64)
+        self.atp_events = np.zeros(0, dtype=np.int64)
+        self.seen = np.zeros((0, 0), dtype=np.uint8)      # lines x gene bits
+        self.atp_first = np.zeros((0, 0), dtype=np.uint8)
+        self.seen_all = np.zeros(0, dtype=np.uint8)       # gene bits, all lines
+        self.atp_first_all = np.zeros(0, dtype=np.uint8)
+
+    def _codes(self, raw: pd.Series, clean, table: dict, new=None) -> np.ndarray:
+        """
+        Global codes for a chunk column, cleaning each distinct value once.
+        'new', if given, is called with the cleaned values that received
+        new codes, in code order.
+        """
+        local, uniques = pd.factorize(raw.fillna("nan").astype(str), use_na_sentinel=False)
+        cleaned = clean(pd.Series(uniques, dtype=object))
+        n_old = len(table)
+        mapping = np.array([table.setdefault(v, len(table)) for v in cleaned], dtype=np.int64)
+        if new is not None and len(table) > n_old:
+            fresh = np.flatnonzero(mapping >= n_old)
+            _, first = np.unique(mapping[fresh], return_index=True)
+            new(cleaned.iloc[fresh[first]])
+        return mapping[local]
+
+    def _flag_atp(self, names: pd.Series) -> None:
+        self._atp_code = np.concatenate([self._atp_code, names.isin(self.atp_genes).to_numpy()])
+
+    def _grow(self) -> None:
+        n_lines, n_bytes = len(self.line_codes), (len(self.gene_codes) + 7) // 8
+        if n_lines > len(self.events):
+            extra = n_lines - len(self.events)
+            self.events = np.concatenate([self.events, np.zeros(extra, dtype=np.int64)])
+            self.atp_events = np.concatenate([self.atp_events, np.zeros(extra, dtype=np.int64)])
+        if (n_lines, n_bytes) != self.seen.shape:
+            for name in ("seen", "atp_first"):
+                old = getattr(self, name)
+                new = np.zeros((n_lines, n_bytes), dtype=np.uint8)
+                new[:old.shape[0], :old.shape[1]] = old
+                setattr(self, name, new)
+            for name in ("seen_all", "atp_first_all"):
+                old = getattr(self, name)
+                setattr(self, name, np.concatenate(
+                    [old, np.zeros(n_bytes - len(old), dtype=np.uint8)]))
+
+    def add_chunk(self, chunk: pd.DataFrame) -> None:
+        """Add a raw (line, gene, is_ATP_gene) chunk, in file order."""
+        line = self._codes(chunk["line"], self.clean_line, self.line_codes)
+        gene = self._codes(chunk["gene"], lambda s: s.str.strip().str.lower(), self.gene_codes,
+                           new=None if self.atp_genes is None else self._flag_atp)
+        if self.atp_genes is None:
+            flag = (
+                chunk["is_ATP_gene"].fillna("nan").astype(str).str.lower()
+                .isin(TRUE_VALUES).to_numpy()
+            )
+        else:
+            flag = self._atp_code[gene]
+        self._grow()
+
+        n_lines = len(self.line_codes)
+        self.events += np.bincount(line, minlength=n_lines)
+        self.atp_events += np.bincount(line[flag], minlength=n_lines)
+
+        byte, bit = gene >> 3, (1 << (gene & 7)).astype(np.uint8)
+        self._first_seen(self.seen[line, byte], bit, line * len(self.gene_codes) + gene,
+                         flag, lambda i: (line[i], byte[i]), self.seen, self.atp_first)
+        self._first_seen(self.seen_all[byte], bit, gene, flag,
+                         lambda i: (byte[i],), self.seen_all, self.atp_first_all)
+
+    @staticmethod
+    def _first_seen(current, bit, key, flag, where, seen, atp_first) -> None:
+        """Set 'seen' bits for new keys, and 'atp_first' from their first row."""
+        new = (current & bit) == 0
+        _, first = np.unique(key[new], return_index=True)
+        rows = np.flatnonzero(new)[first]
+        np.bitwise_or.at(seen, where(rows), bit[rows])
+        atp = rows[flag[rows]]
+        np.bitwise_or.at(atp_first, where(atp), bit[atp])
+
+    def counts(self) -> pd.DataFrame:
+        """Per-line counts, as enrichment_engine.line_counts (sorted lines)."""
+        popcount = lambda bits: np.unpackbits(bits, axis=-1).sum(axis=-1, dtype=np.int64)
+        df = pd.DataFrame(
+            {
+                "events": self.events,
+                "atp_events": self.atp_events,
+                "genes": popcount(self.seen),
+                "atp_genes": popcount(self.atp_first),
+            },
+            index=pd.Index(list(self.line_codes), name="line"),
+        )
+        return df.sort_index()
+
+    def totals(self) -> dict:
+        """The same four counts over all lines (genes unique genome-wide)."""
+        return {
+            "events": int(self.events.sum()),
+            "atp_events": int(self.atp_events.sum()),
+            "genes": int(np.unpackbits(self.seen_all).sum()),
+            "atp_genes": int(np.unpackbits(self.atp_first_all).sum()),
+        }
+
+    def genes(self) -> list:
+        """Cleaned gene names, in code order (bit order of the bitsets)."""
+        return list(self.gene_codes)
+
+    def unique_genes(self) -> pd.DataFrame:
+        """
+        One (line, gene, is_ATP_gene) row per unique gene of each line,
+        flagged as its first occurrence, by sorted line and code order.
+        """
+        n = len(self.gene_codes)
+        seen = np.unpackbits(self.seen, axis=1, bitorder="little")[:, :n].astype(bool)
+        atp = np.unpackbits(self.atp_first, axis=1, bitorder="little")[:, :n].astype(bool)
+        line, gene = np.nonzero(seen)
+        df = pd.DataFrame({
+            "line": np.array(list(self.line_codes), dtype=object)[line],
+            "gene": np.array(self.genes(), dtype=object)[gene],
+            "is_ATP_gene": atp[line, gene],
+        })
+        return df.sort_values("line", kind="stable", ignore_index=True)
+
+    def line_genes(self, line: str) -> dict:
+        """{gene: ATP flag of its first occurrence} for one line."""
+        i = self.line_codes[line]
+        n = len(self.gene_codes)
+        seen = np.unpackbits(self.seen[i], bitorder="little")[:n].astype(bool)
+        atp = np.unpackbits(self.atp_first[i], bitorder="little")[:n].astype(bool)
+        names = self.genes()
+        return {names[g]: bool(atp[g]) for g in np.flatnonzero(seen)}
+
+
+def ingest(path: str, preset: str = "fixed", chunksize: int = 1_000_000,
+           atp_genes=None) -> MutationIngest:
+    """Stream a (line, gene, is_ATP_gene) CSV through MutationIngest."""
+    options = PRESETS[preset]
+    acc = MutationIngest(options["line"], atp_genes)
+    reader = pd.read_csv(
+        path, names=["line", "gene", "is_ATP_gene"], dtype=str,
+        chunksize=chunksize, **options["read"],
+    )
+    for chunk in reader:
+        acc.add_chunk(chunk)
+    return acc
@@ -0,0 +1,104 @@
+"""
+Nucleotide-pool classification of every reaction in a model.
+
+classify_atp_genes.py calls a reaction ATP-consuming when atp_c and
+adp_c both appear, whatever their signs. Here the model becomes a sparse
+metabolites x reactions stoichiometric matrix S, and a pools x
+metabolites matrix P sums each pool's triphosphate over all compartments
+(atp_c, atp_p, atp_e, ...), so P @ S is the net triphosphate coefficient
+of every reaction for every pool in one sparse product. Each (pool,
+reaction) is then labelled from that sign and the reaction bounds:
+
+ - "consumer":   the triphosphate can only be used up (ATP -> ADP, AMP, ...)
+ - "producer":   it can only be made
+ - "reversible": the reaction runs both ways with a nonzero net coefficient
+ - "transport":  it appears but nets to zero (moves between compartments)
+ - "blocked":    both bounds are zero
+ - "":           the pool's triphosphate is not involved
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from model_index import ModelIndex
+
+# Pool name -> metabolite base IDs (BiGG, compartment suffix stripped);
+# only the triphosphate (first entry) decides the label
+NUCLEOTIDE_POOLS = {
+    "ATP": ("atp", "adp", "amp"),
+    "GTP": ("gtp", "gdp", "gmp"),
+    "CTP": ("ctp", "cdp", "cmp"),
+    "UTP": ("utp", "udp", "ump"),
+    "ITP": ("itp", "idp", "imp"),
+    "XTP": ("xtp", "xdp", "xmp"),
+    "dATP": ("datp", "dadp", "damp"),
+    "dGTP": ("dgtp", "dgdp", "dgmp"),
+    "dCTP": ("dctp", "dcdp", "dcmp"),
+    "dTTP": ("dttp", "dtdp", "dtmp"),
+    "dUTP": ("dutp", "dudp", "dump"),
+}
+
+
+def stoichiometric_matrix(index: ModelIndex) -> tuple:
+    """Sparse metabolites x reactions S, with the metabolite and reaction IDs."""
+    reactions = list(index.metabolites)
+    met_ids, rows, cols, vals = {}, [], [], []
+    for j, rxn_id in enumerate(reactions):
+        for met, coef in index.metabolites[rxn_id].items():
+            rows.append(met_ids.setdefault(met, len(met_ids)))
+            cols.append(j)
+            vals.append(coef)
+    S = sparse.csr_matrix((vals, (rows, cols)), shape=(len(met_ids), len(reactions)))
+    return S, list(met_ids), reactions
+
+
+def pool_matrix(met_ids: list, pools: dict = NUCLEOTIDE_POOLS) -> sparse.csr_matrix:
+    """Binary pools x metabolites matrix selecting each pool's triphosphate."""
+    base = pd.Series(met_ids, dtype=object).str.rsplit("_", n=1).str[0]
+    triphosphate = {members[0]: i for i, members in enumerate(pools.values())}
+    rows = base.map(triphosphate)
+    cols = np.flatnonzero(rows.notna().to_numpy())
+    return sparse.csr_matrix(
+        (np.ones(len(cols)), (rows.iloc[cols].astype(int).to_numpy(), cols)),
+        shape=(len(pools), len(met_ids)),
+    )
+
+
+def classify_reactions(index: ModelIndex, pools: dict = NUCLEOTIDE_POOLS) -> pd.DataFrame:
+    """One row per reaction, one label column per pool (see module docstring)."""
+    S, met_ids, reactions = stoichiometric_matrix(index)
+    P = pool_matrix(met_ids, pools)
+    net = (P @ S).toarray()
+    touched = (P @ abs(S)).toarray() > 0
+
+    lb, ub = np.array([index.bounds[r] for r in reactions], dtype=float).T.reshape(2, 1, -1)
+    forward, backward = ub > 0, lb < 0
+    # Direction in which the triphosphate is consumed is allowed
+    uses = np.where(net < 0, forward, backward)
+    makes = np.where(net < 0, backward, forward)
+
+    labels = np.select(
+        [~touched, ~(forward | backward), net == 0, uses & makes, uses, makes],
+        ["", "blocked", "transport", "reversible", "consumer", "producer"],
+        default="blocked",
+    )
+    return pd.DataFrame(labels.T, index=pd.Index(reactions, name="reaction"), columns=list(pools))
+
+
+def pool_genes(index: ModelIndex, labels: pd.DataFrame, pool: str = "ATP",
+               kinds=("consumer",)) -> dict:
+    """{b-number: reactions} for reactions with one of 'kinds' for 'pool'."""
+    return index.genes_of(labels.index[labels[pool].isin(kinds)])
+
+
+if __name__ == "__main__":
+    import sys
+
+    index = ModelIndex.from_json(sys.argv[1] if len(sys.argv) > 1 else "iML1515.json")
+    labels = classify_reactions(index)
+    involved = labels[(labels != "").any(axis=1)]
+    involved.to_csv("reaction_nucleotide_classes.csv")
+    print(f"{index.id}: {len(involved)} of {len(labels)} reactions involve a nucleotide pool")
+    print(labels.apply(pd.Series.value_counts).drop(index="", errors="ignore").fillna(0).astype(int))
+    print("✅ Saved: reaction_nucleotide_classes.csv")
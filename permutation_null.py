@@ -0,0 +1,251 @@
+"""
+Permutation null model for per-line ATP-gene enrichment.
+
+Each line's observed mutations are redistributed over the genome and the
+number landing in ATP genes is recounted, giving an empirical null in
+place of Fisher's fixed 4448 / 225 genome.
+
+ - gene level: the line's unique mutated genes are drawn without
+   replacement; uniformly this is a hypergeometric draw, weighted by
+   CDS length it is successive weighted sampling (see
+   _weighted_gene_draw), counted against the ATP membership mask.
+ - event level: every mutation event lands independently, a binomial
+   draw with the (length-weighted) ATP share of the genome.
+
+Permutations run in chunks, each with its own SeedSequence child keyed
+by (line, chunk), so results do not depend on the number of processes.
+The pooled null is the sum over lines of independent per-line draws.
+Empirical p-values are (1 + #null >= observed) / (1 + n_perm).
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from gene_index import normalize
+
+TOTAL_GENES = 4448
+ATP_TOTAL = 225
+
+# Genome weights shared with worker processes (set by _init_worker)
+_GENOME = {"log_weights": None, "is_atp": None, "alias": None}
+
+
+def load_genome(lengths_file: str, atp_file: str = "atp_genes_with_names.csv") -> tuple:
+    """
+    CDS lengths and ATP membership for the weighted null.
+
+    'lengths_file' is a CSV with gene_name and length columns (one row
+    per CDS); 'atp_file' is classify_atp_genes.py's b_number/gene_name
+    list. Returns (lengths, is_atp) as aligned arrays.
+    """
+    genome = pd.read_csv(lengths_file, usecols=["gene_name", "length"])
+    genome["gene_name"] = normalize(genome["gene_name"])
+    genome = genome.drop_duplicates(subset=["gene_name"])
+    atp = pd.read_csv(atp_file)
+    atp_names = set(normalize(atp["gene_name"])) | set(atp["b_number"].str.lower())
+    is_atp = genome["gene_name"].isin(atp_names).to_numpy()
+    return genome["length"].to_numpy(dtype=float), is_atp
+
+
+def _init_worker(log_weights, is_atp) -> None:
+    _GENOME["log_weights"] = log_weights
+    _GENOME["is_atp"] = is_atp
+    _GENOME["alias"] = None
+    if log_weights is not None:
+        _GENOME["alias"] = _alias_table(np.exp(log_weights - log_weights.max()))
+
+
+def _alias_table(weights: np.ndarray) -> tuple:
+    """Walker/Vose alias table for O(1) draws proportional to 'weights'."""
+    n = len(weights)
+    prob = weights * n / weights.sum()
+    alias = np.arange(n)
+    small = [i for i in range(n) if prob[i] < 1]
+    large = [i for i in range(n) if prob[i] >= 1]
+    while small and large:
+        s, g = small.pop(), large.pop()
+        alias[s] = g
+        prob[g] -= 1 - prob[s]
+        (small if prob[g] < 1 else large).append(g)
+    prob[small + large] = 1.0
+    return prob, alias
+
+
+def _first_distinct(idx: np.ndarray, m: int) -> tuple:
+    """
+    Mask of the first 'm' distinct entries in each row of 'idx', and
+    whether each row had that many.
+    """
+    order = np.argsort(idx, axis=1, kind="stable")
+    ordered = np.take_along_axis(idx, order, axis=1)
+    first = np.ones_like(ordered, dtype=bool)
+    first[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    is_new = np.empty_like(first)
+    np.put_along_axis(is_new, order, first, axis=1)
+    rank = np.cumsum(is_new, axis=1)
+    return is_new & (rank <= m), rank[:, -1] >= m
+
+
+def _weighted_gene_draw(rng, size: int, m: int) -> np.ndarray:
+    """
+    ATP counts of 'size' length-weighted draws of 'm' distinct genes.
+
+    Successive weighted sampling without replacement is sampling with
+    replacement keeping only first occurrences, so for m much smaller
+    than the genome a few extra draws per permutation suffice (rows
+    that still fall short are redrawn). Otherwise Gumbel top-k over the
+    whole genome is used.
+    """
+    log_weights, is_atp = _GENOME["log_weights"], _GENOME["is_atp"]
+    n_genes = len(log_weights)
+    counts = np.zeros(size, dtype=np.int64)
+    if m == 0:
+        return counts
+
+    if 4 * m > n_genes:
+        step = max(1, 2_000_000 // n_genes)  # keep each key block ~16 MB
+        for start in range(0, size, step):
+            keys = log_weights + rng.gumbel(size=(min(step, size - start), n_genes))
+            kth = np.partition(keys, n_genes - m, axis=1)[:, n_genes - m]
+            counts[start:start + len(keys)] = (keys[:, is_atp] >= kth[:, None]).sum(axis=1)
+        return counts
+
+    prob, alias = _GENOME["alias"]
+    todo, pad = np.arange(size), m // 4 + 8
+    while len(todo):
+        idx = rng.integers(n_genes, size=(len(todo), m + pad))
+        idx = np.where(rng.random(idx.shape) < prob[idx], idx, alias[idx])
+        chosen, complete = _first_distinct(idx, m)
+        counts[todo[complete]] = (chosen & is_atp[idx])[complete].sum(axis=1)
+        todo, pad = todo[~complete], 2 * pad
+    return counts
+
+
+def _draw(task: tuple) -> tuple:
+    """One chunk of null ATP counts for one line."""
+    line_idx, chunk_idx, size, m, level, p_atp, seed = task
+    rng = np.random.default_rng(seed)
+
+    if level == "event":
+        null = rng.binomial(m, p_atp, size=size)
+    elif _GENOME["log_weights"] is None:
+        null = rng.hypergeometric(ATP_TOTAL, TOTAL_GENES - ATP_TOTAL, m, size=size)
+    else:
+        null = _weighted_gene_draw(rng, size, m)
+    return line_idx, chunk_idx, null
+
+
+def permutation_null(
+    counts: pd.DataFrame,
+    n_perm: int = 100_000,
+    level: str = "gene",
+    lengths: Optional[np.ndarray] = None,
+    is_atp: Optional[np.ndarray] = None,
+    seed: int = 0,
+    processes: Optional[int] = None,
+    chunksize: int = 10_000,
+) -> pd.DataFrame:
+    """
+    Empirical ATP-enrichment p-values per line and pooled over lines.
+
+    'counts' is enrichment_engine.line_counts output (indexed by line).
+    Without 'lengths' the genome is TOTAL_GENES genes of which ATP_TOTAL
+    are ATP genes; with 'lengths' and 'is_atp' (see load_genome) genes
+    are hit in proportion to CDS length.
+
+    Returns one row per line plus a final "pooled" row, with the
+    observed and mean null ATP counts and the upper (enrichment) and
+    lower (depletion) empirical p-values.
+    """
+    if level not in ("gene", "event"):
+        raise ValueError("level should be 'gene' or 'event'")
+    total, observed = (("genes", "atp_genes") if level == "gene"
+                       else ("events", "atp_events"))
+    m = counts[total].to_numpy(dtype=np.int64)
+    obs = counts[observed].to_numpy(dtype=np.int64)
+
+    log_weights = None
+    p_atp = ATP_TOTAL / TOTAL_GENES
+    if lengths is not None:
+        lengths = np.asarray(lengths, dtype=float)
+        is_atp = np.asarray(is_atp, dtype=bool)
+        log_weights = np.log(lengths)
+        p_atp = lengths[is_atp].sum() / lengths.sum()
+        n_genes = len(lengths)
+    else:
+        n_genes = TOTAL_GENES
+    if level == "gene" and (m > n_genes).any():
+        raise ValueError(f"A line has more mutated genes than the genome ({n_genes})")
+
+    sizes = [min(chunksize, n_perm - s) for s in range(0, n_perm, chunksize)]
+    seeds = np.random.SeedSequence(seed).spawn(len(m) * len(sizes))
+    tasks = [
+        (i, j, size, int(m[i]), level, p_atp, seeds[i * len(sizes) + j])
+        for i in range(len(m))
+        for j, size in enumerate(sizes)
+    ]
+
+    n_ge, n_le, total_null = (np.zeros(len(m), dtype=np.int64) for _ in range(3))
+    pooled = np.zeros(n_perm, dtype=np.int64)
+    offsets = np.cumsum([0] + sizes)
+
+    def accumulate(results):
+        for i, j, null in results:
+            n_ge[i] += (null >= obs[i]).sum()
+            n_le[i] += (null <= obs[i]).sum()
+            total_null[i] += null.sum()
+            pooled[offsets[j]:offsets[j + 1]] += null
+
+    # Hypergeometric and binomial draws are cheap enough in-process
+    if processes == 1 or log_weights is None or level == "event":
+        _init_worker(log_weights, is_atp)
+        accumulate(map(_draw, tasks))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(processes or os.cpu_count(), len(tasks)) or 1,
+            initializer=_init_worker,
+            initargs=(log_weights, is_atp),
+        ) as pool:
+            accumulate(pool.map(_draw, tasks))
+
+    result = pd.DataFrame({
+        "line": list(counts.index),
+        "n": m,
+        "observed_atp": obs,
+        "expected_atp": total_null / n_perm,
+        "p_enrichment": (1 + n_ge) / (1 + n_perm),
+        "p_depletion": (1 + n_le) / (1 + n_perm),
+    })
+    pooled_obs = obs.sum()
+    result.loc[len(result)] = {
+        "line": "pooled",
+        "n": m.sum(),
+        "observed_atp": pooled_obs,
+        "expected_atp": pooled.mean(),
+        "p_enrichment": (1 + (pooled >= pooled_obs).sum()) / (1 + n_perm),
+        "p_depletion": (1 + (pooled <= pooled_obs).sum()) / (1 + n_perm),
+    }
+    return result
+
+
+if __name__ == "__main__":
+    import sys
+
+    from mutation_ingest import ingest
+
+    lengths = is_atp = None
+    if len(sys.argv) > 1:  # optional CDS length table
+        lengths, is_atp = load_genome(sys.argv[1])
+
+    counts = ingest("fixed_SNP_bylines_with_ATPnew.csv", preset="fixed").counts()
+    for level in ("gene", "event"):
+        results = permutation_null(counts, level=level, lengths=lengths, is_atp=is_atp)
+        out = f"linewise_ATP_permutation_{level}.csv"
+        results.to_csv(out, index=False)
+        print(f"\n🎲 {level.upper()}-LEVEL PERMUTATION NULL")
+        print(results.round(5))
+        print(f"✅ Saved: {out}")
@@ -0,0 +1,229 @@
+"""
+Content-hash cached runner for the annotation -> enrichment scripts.
+
+Each stage is one of the standalone scripts with the files it reads and
+writes. A stage's key is the SHA-256 of its input files and of its code
+(the script plus the local modules it imports, followed recursively).
+A stage is skipped when its key matches the last successful run and its
+outputs still have the recorded hashes; otherwise it is rerun. Keys are
+computed only once the stage's producers have finished, so a rerun whose
+outputs come out byte-identical does not invalidate anything downstream.
+
+Stages become ready as soon as the stages producing their inputs are
+done and run concurrently (one subprocess each), so the EcoCyc and BiGG
+branches and the SNP-table stages proceed in parallel. State and stage
+logs are kept in .pipeline/.
+
+    python pipeline.py              # run what changed
+    python pipeline.py --dry-run    # show what would run
+    python pipeline.py --force enrichment
+"""
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import NamedTuple
+
+STATE_DIR = ".pipeline"
+IMPORT = re.compile(r"^\s*(?:from\s+(\w+)\s+import|import\s+(\w+))", re.MULTILINE)
+
+
+class Stage(NamedTuple):
+    name: str
+    script: str
+    inputs: tuple
+    outputs: tuple
+    optional: tuple = ()   # inputs that may be absent (hashed as absent)
+
+
+STAGES = (
+    # EcoCyc branch
+    Stage("ecocyc_map", "analyze_ecocyc_atp.py",
+          ("ecocyc_all_reactions.csv",),
+          ("reaction_gene_map_atp.tsv", "gene_counts_atp.tsv")),
+    Stage("ecocyc_filter", "filter_atp_reactions.py",
+          ("reaction_gene_map_atp.tsv", "genes_to_lookup.txt"),
+          ("atp_reactions_for_requested_genes.csv", "missing_genes.csv")),
+    # BiGG branch
+    Stage("bigg_classify", "classify_atp_genes.py",
+          ("iML1515.json",),
+          ("atp_genes.txt", "atp_genes_with_names.csv", "atp_genes_with_reactions.csv",
+           "atp_genes_with_pathways.csv", "atp_genes_condensed.csv",
+           "reaction_nucleotide_classes.csv")),
+    # Joins
+    Stage("compare", "compare_ecocyc_bigg.py",
+          ("gene_counts_atp.tsv", "atp_genes_with_pathways.csv", "iML1515.json"),
+          ("unique_to_ecocyc.csv", "unique_to_bigg.csv", "shared_genes.csv",
+           "gene_provenance.csv"),
+          ("ecocyc_genes.tsv",)),
+    Stage("enrichment", "enrichment_ATP_fixed.py",
+          ("mutated_CDS_fixed.csv", "atp_genes_with_names.csv", "iML1515.json"),
+          ("mutated_ATP_fixed_overlap.csv", "unresolved_mutated_genes.csv"),
+          ("ecocyc_genes.tsv",)),
+    # Per-line SNP tables
+    Stage("linewise", "linewise_enrichment.py",
+          ("fixed_SNP_bylines_with_ATPflag.csv",), ("linewise_ATP_enrichment.csv",)),
+    Stage("linewise_fixed", "linewise_enrichment_fixed.py",
+          ("fixed_SNP_bylines_with_ATPnew.csv",), ("linewise_ATP_enrichment_fixed.csv",)),
+    Stage("linewise_summary", "linewise_ATP_summary_fixed.py",
+          ("fixed_SNP_bylines_with_ATPnew.csv",), ()),
+)
+
+
+def _digest(path: str) -> str:
+    """SHA-256 of a file, or "absent"."""
+    if not os.path.exists(path):
+        return "absent"
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def code_files(script: str, root: str = ".") -> list:
+    """The script and every local module it imports, recursively (sorted)."""
+    seen, todo = set(), [script]
+    while todo:
+        path = todo.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        with open(os.path.join(root, path)) as f:
+            source = f.read()
+        for match in IMPORT.finditer(source):
+            module = (match.group(1) or match.group(2)) + ".py"
+            if os.path.exists(os.path.join(root, module)):
+                todo.append(module)
+    return sorted(seen)
+
+
+def stage_key(stage: Stage, root: str = ".") -> str:
+    h = hashlib.sha256()
+    for path in sorted(set(stage.inputs) | set(stage.optional)) + code_files(stage.script, root):
+        h.update(f"{path}\0{_digest(os.path.join(root, path))}\n".encode())
+    return h.hexdigest()
+
+
+def _producers(stages) -> dict:
+    """{stage name: names of the stages producing its inputs}."""
+    made_by = {out: s.name for s in stages for out in s.outputs}
+    return {s.name: {made_by[i] for i in s.inputs + s.optional
+                     if i in made_by and made_by[i] != s.name}
+            for s in stages}
+
+
+class Pipeline:
+    """Runs STAGES in 'root', skipping stages whose inputs and code are unchanged."""
+
+    def __init__(self, stages=STAGES, root: str = ".", workers: int = None):
+        self.stages = {s.name: s for s in stages}
+        self.root = root
+        self.workers = workers or min(len(stages), os.cpu_count() or 1) or 1
+        self.state_path = os.path.join(root, STATE_DIR, "state.json")
+        self.state = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                self.state = json.load(f)
+
+    def _outputs_intact(self, stage: Stage) -> bool:
+        recorded = self.state.get(stage.name, {}).get("outputs", {})
+        return all(recorded.get(out) == _digest(os.path.join(self.root, out))
+                   for out in stage.outputs)
+
+    def up_to_date(self, stage: Stage) -> bool:
+        return (self.state.get(stage.name, {}).get("key") == stage_key(stage, self.root)
+                and self._outputs_intact(stage))
+
+    def _run(self, stage: Stage) -> tuple:
+        """Run one stage; returns (name, status, state record or None, seconds)."""
+        missing = [i for i in stage.inputs if not os.path.exists(os.path.join(self.root, i))]
+        if missing:
+            return stage.name, f"skipped: missing {', '.join(missing)}", None, 0.0
+        key = stage_key(stage, self.root)
+        log_path = os.path.join(self.root, STATE_DIR, f"{stage.name}.log")
+        start = time.perf_counter()
+        with open(log_path, "w") as log:
+            proc = subprocess.run([sys.executable, stage.script], cwd=self.root,
+                                  stdout=log, stderr=subprocess.STDOUT)
+        elapsed = time.perf_counter() - start
+        if proc.returncode != 0:
+            return stage.name, f"failed: exit {proc.returncode}, see {log_path}", None, elapsed
+        record = {
+            "key": key,
+            "outputs": {out: _digest(os.path.join(self.root, out)) for out in stage.outputs},
+        }
+        return stage.name, "ran", record, elapsed
+
+    def _save_state(self) -> None:
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.state_path)
+
+    def run(self, targets=None, force=(), dry_run: bool = False) -> dict:
+        """
+        Bring 'targets' (default: all stages) and everything they depend
+        on up to date. Returns {stage: status}; a stage whose producer
+        failed or was skipped for missing inputs is "blocked".
+        """
+        os.makedirs(os.path.join(self.root, STATE_DIR), exist_ok=True)
+        producers = _producers(self.stages.values())
+        wanted, todo = set(), list(targets or self.stages)
+        while todo:
+            name = todo.pop()
+            if name not in wanted:
+                wanted.add(name)
+                todo.extend(producers[name])
+
+        status, running = {}, {}
+        pending = [n for n in self.stages if n in wanted]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while pending or running:
+                for name in list(pending):
+                    deps = producers[name] & wanted
+                    if any(status.get(d, "").startswith(("failed", "skipped", "blocked"))
+                           for d in deps):
+                        status[name] = "blocked"
+                        pending.remove(name)
+                    elif all(d in status for d in deps):
+                        pending.remove(name)
+                        stage = self.stages[name]
+                        if name not in force and self.up_to_date(stage):
+                            status[name] = "cached"
+                        elif dry_run:
+                            status[name] = "would run"
+                        else:
+                            running[pool.submit(self._run, stage)] = name
+                        print(f"[{name}] {status.get(name, 'running')}", flush=True)
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, status[name], record, elapsed = future.result()
+                    del running[future]
+                    print(f"[{name}] {status[name]} ({elapsed:.1f} s)", flush=True)
+                    if record is not None:
+                        self.state[name] = record
+                        self._save_state()
+        return status
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the ATP annotation/enrichment pipeline")
+    parser.add_argument("targets", nargs="*", help="stages to bring up to date (default: all)")
+    parser.add_argument("--force", nargs="*", default=[], help="stages to rerun regardless")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    status = Pipeline(workers=args.workers).run(args.targets or None, set(args.force),
+                                                args.dry_run)
+    sys.exit(1 if any(s.startswith("failed") for s in status.values()) else 0)
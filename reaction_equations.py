@@ -0,0 +1,64 @@
+"""
+Parser for EcoCyc-style reaction equations ("ATP + L-glutamate -> ...").
+
+Each distinct equation string is parsed once (parse_equation is cached)
+into its left and right species and its direction. consumed_nucleotides
+factorizes a column, parses only the distinct strings and maps the
+result back, since in reaction_gene_map_atp.tsv the same equation
+repeats once per gene x enzyme pair.
+
+A side is split at the first arrow, as filter_atp_reactions.py always
+did; a string without an arrow is all left side.
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+ARROW = re.compile(r'\s*(?:<[-−]*>|[-−]*>|→|⇌|<->|->)\s*')
+REVERSIBLE = re.compile(r'<[-−]*>|⇌|<->')
+PLUS = re.compile(r'\s+\+\s+')
+COEFFICIENT = re.compile(r'^\(?\d+(?:\.\d+)?\)?\s+|^an?\s+|^n\s+', re.IGNORECASE)
+NUCLEOTIDES = ("ATP", "GTP", "CTP", "UTP", "ITP", "dATP", "dGTP", "dCTP", "dTTP")
+
+
+class Equation(NamedTuple):
+    left: str            # raw left-hand side
+    right: str           # raw right-hand side ("" without an arrow)
+    direction: str       # "forward", "reversible" or "" (no arrow)
+    reactants: tuple     # left species, coefficients stripped
+    products: tuple
+
+
+def _species(side: str) -> tuple:
+    return tuple(COEFFICIENT.sub("", s.strip()) for s in PLUS.split(side) if s.strip())
+
+
+@lru_cache(maxsize=None)
+def parse_equation(text: str) -> Equation:
+    parts = ARROW.split(text, maxsplit=1)
+    left = parts[0] if parts else ""
+    right = parts[1] if len(parts) > 1 else ""
+    arrow = ARROW.search(text)
+    if arrow is None:
+        direction = ""
+    else:
+        direction = "reversible" if REVERSIBLE.search(arrow.group()) else "forward"
+    return Equation(left, right, direction, _species(left), _species(right))
+
+
+def consumed_nucleotides(equations: pd.Series, nucleotides=NUCLEOTIDES) -> pd.DataFrame:
+    """
+    Boolean column per nucleotide: whether it appears as a whole word on
+    the left side (case-insensitive), i.e. is consumed as written.
+    """
+    codes, uniques = pd.factorize(equations.astype(str))
+    left = pd.Series([parse_equation(u).left.upper() for u in uniques], dtype=object)
+    hits = np.column_stack([
+        left.str.contains(rf"\b{n.upper()}\b", regex=True).to_numpy(dtype=bool)
+        for n in nucleotides
+    ]) if len(left) else np.zeros((0, len(nucleotides)), dtype=bool)
+    return pd.DataFrame(hits[codes], index=equations.index, columns=list(nucleotides))
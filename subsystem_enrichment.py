@@ -0,0 +1,177 @@
+"""
+Enrichment of every iML1515 subsystem (and user gene sets) in every line.
+
+Gene sets become a sparse genes x sets membership matrix and the mutated
+genes a sparse lines x genes matrix, so all line/set overlaps come from
+one sparse product. Each overlap is tested with the hypergeometric upper
+tail (Fisher's one-sided test against a TOTAL_GENES genome, as in the
+linewise scripts), all at once, and Benjamini–Hochberg q-values are
+computed within each line.
+
+Genes are matched by lower-cased name or b-number.
+"""
+
+import json
+import re
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.stats import hypergeom
+
+TOTAL_GENES = 4448
+
+
+def subsystem_gene_sets(model_file: str = "iML1515.json") -> tuple:
+    """
+    Subsystem gene sets from the model JSON, via the b-numbers in each
+    reaction's gene_reaction_rule (as classify_atp_genes.py does).
+    Returns ({subsystem: set of b-numbers}, {b-number: gene name}).
+    """
+    with open(model_file) as f:
+        M = json.load(f)
+    sets = {}
+    for rxn in M["reactions"]:
+        genes = re.findall(r"b\d{4}", rxn.get("gene_reaction_rule", ""))
+        if genes:
+            sets.setdefault(rxn.get("subsystem", "Unknown"), set()).update(genes)
+    names = {g["id"]: g.get("name", "") for g in M["genes"]}
+    return sets, names
+
+
+def read_gene_sets(path: str) -> dict:
+    """
+    User gene sets from a .gmt file (name, description, genes... per
+    line, tab-separated) or a two-column CSV (gene_set, gene).
+    """
+    if path.endswith(".gmt"):
+        sets = {}
+        with open(path) as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) > 2:
+                    sets[fields[0]] = {g for g in fields[2:] if g}
+        return sets
+    df = pd.read_csv(path, usecols=["gene_set", "gene"]).dropna()
+    return {name: set(genes) for name, genes in df.groupby("gene_set")["gene"]}
+
+
+def _gene_index(gene_sets: dict, names: dict) -> dict:
+    """
+    Column index for every gene: model genes first, reachable by
+    b-number or name, then any other gene named in a set.
+    """
+    index, n_cols = {}, 0
+    for b_number, name in names.items():
+        if b_number.lower() not in index:
+            index[b_number.lower()] = n_cols
+            n_cols += 1
+        if name:
+            index.setdefault(name.lower().strip(), index[b_number.lower()])
+    for genes in gene_sets.values():
+        for g in genes:
+            key = g.lower().strip()
+            if key not in index:
+                index[key] = n_cols
+                n_cols += 1
+    return index
+
+
+def membership_matrix(gene_sets: dict, index: dict) -> sparse.csc_matrix:
+    """Binary genes x sets matrix (columns in gene_sets order)."""
+    rows, cols = [], []
+    for j, genes in enumerate(gene_sets.values()):
+        members = {index[g.lower().strip()] for g in genes}
+        rows.extend(members)
+        cols.extend([j] * len(members))
+    n_genes = max(index.values(), default=-1) + 1
+    return sparse.csc_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(n_genes, len(gene_sets))
+    )
+
+
+def line_matrix(df: pd.DataFrame, index: dict, n_genes: int) -> tuple:
+    """
+    Binary lines x genes matrix of unique mutated genes, plus the number
+    of unique mutated genes per line (including genes in no set). A gene
+    listed under both its name and its b-number counts once.
+    """
+    cols = df["gene"].map(index)
+    unique = pd.DataFrame({
+        "line": df["line"].to_numpy(),
+        "col": cols.to_numpy(),
+        "gene": df["gene"].where(cols.isna()).to_numpy(),  # genes in no set
+    }).drop_duplicates()
+    lines = pd.Index(sorted(unique["line"].unique()))
+    known = unique["col"].notna().to_numpy()
+    mat = sparse.csr_matrix(
+        (np.ones(known.sum(), dtype=np.int32),
+         (lines.get_indexer(unique["line"])[known], unique["col"][known].astype(int))),
+        shape=(len(lines), n_genes),
+    )
+    return lines, mat, unique.groupby("line").size().reindex(lines).to_numpy()
+
+
+def bh_adjust(p: np.ndarray) -> np.ndarray:
+    """Benjamini–Hochberg q-values along the last axis."""
+    p = np.asarray(p, dtype=float)
+    m = p.shape[-1]
+    order = np.argsort(p, axis=-1)
+    ranked = np.take_along_axis(p, order, axis=-1) * m / np.arange(1, m + 1)
+    ranked = np.minimum.accumulate(ranked[..., ::-1], axis=-1)[..., ::-1]
+    q = np.empty_like(ranked)
+    np.put_along_axis(q, order, np.minimum(ranked, 1.0), axis=-1)
+    return q
+
+
+def set_enrichment(df: pd.DataFrame, gene_sets: dict, names: dict = None,
+                   total_genes: int = TOTAL_GENES) -> pd.DataFrame:
+    """
+    Test every gene set in every line of a cleaned (line, gene,
+    is_ATP_gene) table. Returns one row per (line, set), sorted by line
+    and p-value, with overlap, expected overlap, fold enrichment,
+    p_value and per-line BH q_value.
+    """
+    index = _gene_index(gene_sets, names or {})
+    members = membership_matrix(gene_sets, index)
+    lines, mutated, n_mutated = line_matrix(df, index, members.shape[0])
+
+    overlap = (mutated @ members).toarray()
+    set_size = np.asarray(members.sum(axis=0)).ravel()
+    n = n_mutated[:, None]
+    p = hypergeom.sf(overlap - 1, total_genes, set_size[None, :], n)
+    q = bh_adjust(p)
+    expected = n * set_size[None, :] / total_genes
+
+    out = pd.DataFrame({
+        "line": np.repeat(lines.to_numpy(), len(gene_sets)),
+        "gene_set": np.tile(list(gene_sets), len(lines)),
+        "set_size": np.tile(set_size, len(lines)),
+        "mutated_genes": np.repeat(n_mutated, len(gene_sets)),
+        "overlap": overlap.ravel(),
+        "expected": expected.ravel(),
+        "fold_enrichment": (overlap / np.where(expected > 0, expected, np.nan)).ravel(),
+        "p_value": p.ravel(),
+        "q_value": q.ravel(),
+    })
+    return out.sort_values(["line", "p_value"], kind="stable", ignore_index=True)
+
+
+if __name__ == "__main__":
+    import sys
+
+    from mutation_ingest import ingest
+
+    df = ingest("fixed_SNP_bylines_with_ATPnew.csv", preset="fixed").unique_genes()
+
+    gene_sets, names = subsystem_gene_sets("iML1515.json")
+    with open("atp_genes.txt") as f:
+        gene_sets["ATP-consuming (atp_genes.txt)"] = {g.strip() for g in f if g.strip()}
+    for path in sys.argv[1:]:  # extra .gmt / CSV gene sets
+        gene_sets.update(read_gene_sets(path))
+
+    results = set_enrichment(df, gene_sets, names)
+    results.to_csv("linewise_subsystem_enrichment.csv", index=False)
+    print("📊 TOP SUBSYSTEMS PER LINE (q < 0.05)")
+    print(results[results["q_value"] < 0.05].round(4).to_string(index=False))
+    print("\n✅ Saved: linewise_subsystem_enrichment.csv")